@@ -0,0 +1,86 @@
+"""
+Mesure taille et temps de génération d'un Excel FO57 pour un conteneur.
+
+    python benchmarks/bench_xlsx_output.py [nombre_de_bobines]
+
+Le template et les données sont synthétiques (générés dans un dossier
+temporaire) : aucun fichier réel n'est nécessaire.
+"""
+import os
+import sys
+import tempfile
+import time
+import zipfile
+
+import openpyxl
+import pandas as pd
+from openpyxl.styles import Alignment, Border, Font, Side
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from generator.utils.excel_processor import ExcelProcessor  # noqa: E402
+
+HEADERS = ["N°", "N° FOURNISSEUR", "FOURNISSEUR", "CODE BARRE", "REF PAPIER",
+           "DIAM", "POIDS", "N° CERTIFICAT FSC", "TYPE CERTIFICATION"]
+
+
+def build_template(path, data_rows=20):
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "FO57"
+    sheet["A3"] = "CARISTE : "
+    sheet["D3"] = "DATE : "
+    sheet["A5"] = "N° CT : "
+    sheet["D5"] = "No. Dossier : "
+    thin = Side(style="thin")
+    for col, header in enumerate(HEADERS, 1):
+        sheet.cell(row=14, column=col, value=header).font = Font(bold=True)
+    for row in range(15, 15 + data_rows):
+        sheet.cell(row=row, column=1, value=row - 14)
+        for col in range(1, len(HEADERS) + 1):
+            cell = sheet.cell(row=row, column=col)
+            cell.border = Border(left=thin, right=thin, top=thin, bottom=thin)
+            cell.font = Font(name="Calibri", size=11)
+            cell.alignment = Alignment(horizontal="center", vertical="center")
+    workbook.save(path)
+
+
+def build_data(rows):
+    return pd.DataFrame({
+        "CONTENEUR": ["MSCU1234567"] * rows,
+        "NO_BOBINE": [f"B25{i:05d}-2A" for i in range(rows)],
+        "REF_PAPIER": [f"KRAFT {120 + i % 3}" for i in range(rows)],
+        "DIAMETRE": [1000 + i % 250 for i in range(rows)],
+        "POIDS": [450 + i % 400 for i in range(rows)],
+    })
+
+
+def main():
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 500
+    with tempfile.TemporaryDirectory() as tmp:
+        template_path = os.path.join(tmp, "zzzz.xlsx")
+        build_template(template_path)
+        processor = ExcelProcessor()
+        processor.set_template(template_path, positions=processor.compile_template(template_path))
+        data = build_data(rows)
+
+        start = time.perf_counter()
+        path = processor.create_excel(
+            data=data, container="MSCU1234567", output_dir=tmp,
+            cariste="Cariste", fournisseur="PAPETERIE DU NORD",
+            numero_dossier="D-2025-001", type_certification="FSC MIX 70%",
+            numero_certificat="FSC-C123456",
+        )
+        elapsed = time.perf_counter() - start
+
+        with zipfile.ZipFile(path) as archive:
+            sizes = {info.filename: info.file_size for info in archive.infolist()}
+        workbook = openpyxl.load_workbook(path)
+        print(f"{rows} bobines : {elapsed:.3f}s, {os.path.getsize(path)} octets "
+              f"(sheet1.xml {sizes['xl/worksheets/sheet1.xml']} o, "
+              f"styles.xml {sizes['xl/styles.xml']} o, "
+              f"{len(workbook._cell_styles)} styles de cellule)")
+
+
+if __name__ == "__main__":
+    main()
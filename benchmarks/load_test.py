@@ -0,0 +1,286 @@
+"""
+Test de charge de la page d'upload : N envois simultanés de PL synthétiques.
+
+    python benchmarks/load_test.py --requests 40 --concurrency 10
+    python benchmarks/load_test.py --server runserver
+    python benchmarks/load_test.py --url http://127.0.0.1:8000/   (serveur déjà lancé)
+
+Sans --url, l'application est lancée localement (gunicorn.conf.py par défaut)
+sur une base SQLite et un MEDIA_ROOT temporaires. Chaque requête simule un
+opérateur : GET de la page (jeton CSRF), puis POST multipart du PL et du
+template. Rapport : débit, latences p50/p95/p99, taux d'erreur et mémoire
+(RSS) de chaque processus serveur (Linux, via /proc).
+"""
+import argparse
+import http.cookiejar
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import pandas as pd
+
+from bench_xlsx_output import build_template
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+CSRF_RE = re.compile(rb'name="csrfmiddlewaretoken" value="([^"]+)"')
+ALERT_RE = re.compile(rb'role="alert">\s*(.*?)\s*<', re.S)
+
+
+# ----------------------------------------------------------------------------
+# Données synthétiques
+# ----------------------------------------------------------------------------
+
+def build_pl(containers, rows, seed):
+    """PL xlsx en mémoire ; `seed` distinct = contenu distinct (pas de réutilisation)"""
+    data = pd.DataFrame({
+        "CONTENEUR": [f"LT{seed:04d}{i % containers:03d}" for i in range(rows * containers)],
+        "REEL NO.": [f"B{seed:04d}{i:06d}-2A" for i in range(rows * containers)],
+        "REF PAPIER": [f"KRAFT {120 + i % 3}" for i in range(rows * containers)],
+        "DIAMETRE": [1000 + i % 250 for i in range(rows * containers)],
+        "POIDS": [450 + i % 400 for i in range(rows * containers)],
+    })
+    buffer = BytesIO()
+    data.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+def encode_multipart(fields, files):
+    boundary = uuid.uuid4().hex
+    lines = []
+    for name, value in fields.items():
+        lines.append(f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"\r\n\r\n{value}\r\n'.encode())
+    for name, (filename, content) in files.items():
+        lines.append(
+            f'--{boundary}\r\nContent-Disposition: form-data; name="{name}"; filename="{filename}"\r\n'
+            f'Content-Type: application/vnd.openxmlformats-officedocument.spreadsheetml.sheet\r\n\r\n'.encode()
+        )
+        lines.append(content + b'\r\n')
+    lines.append(f'--{boundary}--\r\n'.encode())
+    return b''.join(lines), f'multipart/form-data; boundary={boundary}'
+
+
+# ----------------------------------------------------------------------------
+# Serveur local
+# ----------------------------------------------------------------------------
+
+def start_server(args, work_dir):
+    env = dict(
+        os.environ,
+        SQLITE_PATH=os.path.join(work_dir, 'db.sqlite3'),
+        MEDIA_ROOT=os.path.join(work_dir, 'media'),
+        PORT=str(args.port),
+        PYTHONUNBUFFERED='1',
+    )
+    if args.workers:
+        env['GUNICORN_WORKERS'] = str(args.workers)
+    if args.threads:
+        env['GUNICORN_THREADS'] = str(args.threads)
+
+    subprocess.run([sys.executable, 'manage.py', 'migrate', '--noinput', '-v', '0'],
+                   cwd=ROOT, env=env, check=True)
+    if args.server == 'gunicorn':
+        command = [sys.executable, '-m', 'gunicorn', '-c', 'gunicorn.conf.py', 'packing_list.wsgi:application']
+    else:
+        command = [sys.executable, 'manage.py', 'runserver', '--noreload', f'127.0.0.1:{args.port}']
+    log = open(os.path.join(work_dir, 'server.log'), 'wb')
+    process = subprocess.Popen(command, cwd=ROOT, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    url = f'http://127.0.0.1:{args.port}/'
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError(f"Le serveur s'est arrêté (voir {log.name})")
+        try:
+            with urllib.request.urlopen(url + 'healthz', timeout=2):
+                return process, url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+    process.terminate()
+    raise RuntimeError(f"Serveur injoignable après 60s (voir {log.name})")
+
+
+def _children(pid):
+    """PID des descendants directs d'un processus (workers gunicorn)"""
+    children = []
+    for entry in os.listdir('/proc'):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f'/proc/{entry}/stat') as f:
+                # Le nom du processus peut contenir des espaces : on repart de la ')'
+                ppid = int(f.read().rsplit(')', 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        if ppid == pid:
+            children.append(int(entry))
+    return children
+
+
+def _memory_kb(pid):
+    """(RSS, pic RSS) en Ko d'après /proc/<pid>/status"""
+    values = {}
+    try:
+        with open(f'/proc/{pid}/status') as f:
+            for line in f:
+                if line.startswith(('VmRSS:', 'VmHWM:')):
+                    key, value = line.split(':', 1)
+                    values[key] = int(value.split()[0])
+    except OSError:
+        return None
+    return values.get('VmRSS', 0), values.get('VmHWM', 0)
+
+
+class MemorySampler(threading.Thread):
+    """Relève périodiquement la mémoire du maître et de ses workers"""
+
+    def __init__(self, pid, interval=0.2):
+        super().__init__(daemon=True)
+        self.pid = pid
+        self.interval = interval
+        self.peaks = {}
+        self._stop_event = threading.Event()
+
+    def sample(self):
+        for pid in [self.pid] + _children(self.pid):
+            memory = _memory_kb(pid)
+            if memory:
+                self.peaks[pid] = max(self.peaks.get(pid, 0), *memory)
+
+    def run(self):
+        while not self._stop_event.is_set():
+            self.sample()
+            self._stop_event.wait(self.interval)
+
+    def stop(self):
+        self._stop_event.set()
+        self.join()
+        self.sample()
+
+
+# ----------------------------------------------------------------------------
+# Charge
+# ----------------------------------------------------------------------------
+
+def submit(url, template, pl_content, timeout):
+    """Un opérateur : GET (jeton CSRF) puis POST du formulaire. Retourne (latence, erreur)"""
+    opener = urllib.request.build_opener(urllib.request.HTTPCookieProcessor(http.cookiejar.CookieJar()))
+    try:
+        with opener.open(url, timeout=timeout) as response:
+            token = CSRF_RE.search(response.read())
+        if not token:
+            return None, "jeton CSRF introuvable"
+        body, content_type = encode_multipart(
+            {
+                'csrfmiddlewaretoken': token.group(1).decode(),
+                'cariste': 'Charge',
+                'fournisseur': 'PAPETERIE DU NORD',
+                'numero_dossier': 'LT-001',
+                'type_certification': 'FSC MIX 70%',
+                'numero_certificat': 'FSC-C123456',
+            },
+            {'preparation_pl': ('pl.xlsx', pl_content), 'zzz_file': ('zzzz.xlsx', template)},
+        )
+        request = urllib.request.Request(url, data=body, headers={'Content-Type': content_type, 'Referer': url})
+        start = time.perf_counter()
+        with opener.open(request, timeout=timeout) as response:
+            page = response.read()
+        latency = time.perf_counter() - start
+    except urllib.error.HTTPError as e:
+        return None, f"HTTP {e.code}"
+    except (urllib.error.URLError, OSError) as e:
+        return None, type(e).__name__
+
+    if b'/artifacts/' not in page:
+        alert = ALERT_RE.search(page)
+        return latency, alert.group(1).decode(errors='replace')[:80] if alert else "aucun résultat"
+    return latency, None
+
+
+def percentile(values, p):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--requests', type=int, default=20, help="nombre total d'envois")
+    parser.add_argument('--concurrency', type=int, default=10, help="envois simultanés")
+    parser.add_argument('--containers', type=int, default=3, help="conteneurs par PL")
+    parser.add_argument('--rows', type=int, default=100, help="bobines par conteneur")
+    parser.add_argument('--same-pl', action='store_true', help="même PL pour tous (teste la réutilisation)")
+    parser.add_argument('--server', choices=['gunicorn', 'runserver'], default='gunicorn')
+    parser.add_argument('--workers', type=int, help="GUNICORN_WORKERS")
+    parser.add_argument('--threads', type=int, help="GUNICORN_THREADS")
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--url', help="serveur déjà lancé (pas de démarrage local)")
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--keep', action='store_true', help="conserver le dossier temporaire (base, logs)")
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp(prefix='load_test_')
+    template_path = os.path.join(work_dir, 'zzzz.xlsx')
+    build_template(template_path)
+    with open(template_path, 'rb') as f:
+        template = f.read()
+    print(f"Préparation de {args.requests} PL ({args.containers} x {args.rows} bobines)...")
+    pls = [build_pl(args.containers, args.rows, 0 if args.same_pl else i) for i in range(args.requests)]
+
+    process = sampler = None
+    try:
+        if args.url:
+            url = args.url
+        else:
+            process, url = start_server(args, work_dir)
+            if os.path.isdir('/proc'):
+                sampler = MemorySampler(process.pid)
+                sampler.start()
+        print(f"Charge : {args.requests} envois, {args.concurrency} simultanés -> {url}")
+
+        start = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            outcomes = list(pool.map(lambda pl: submit(url, template, pl, args.timeout), pls))
+        elapsed = time.perf_counter() - start
+    finally:
+        if sampler:
+            sampler.stop()
+        if process:
+            process.terminate()
+            process.wait(timeout=30)
+
+    latencies = [latency for latency, error in outcomes if error is None]
+    errors = [error for _, error in outcomes if error is not None]
+    print()
+    print(f"Durée totale      : {elapsed:.1f}s")
+    print(f"Débit             : {len(latencies) / elapsed:.2f} envois réussis/s")
+    print(f"Erreurs           : {len(errors)}/{len(outcomes)} ({100 * len(errors) / len(outcomes):.0f}%)")
+    for reason in sorted(set(errors)):
+        print(f"  {errors.count(reason):4d} x {reason}")
+    if latencies:
+        print(f"Latence p50/p95/p99 : {percentile(latencies, 50):.2f}s / "
+              f"{percentile(latencies, 95):.2f}s / {percentile(latencies, 99):.2f}s "
+              f"(max {max(latencies):.2f}s)")
+    if sampler:
+        print("Mémoire (pic RSS) :")
+        for pid, peak in sorted(sampler.peaks.items()):
+            role = 'maître' if pid == process.pid else 'worker'
+            print(f"  {role:6s} {pid:7d} : {peak / 1024:.0f} Mo")
+
+    if args.keep:
+        print(f"Dossier conservé : {work_dir}")
+    else:
+        shutil.rmtree(work_dir, ignore_errors=True)
+    return 1 if errors else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
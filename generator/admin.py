@@ -1,3 +1,30 @@
 from django.contrib import admin
+from django.utils.html import format_html
 
-# Register your models here.
+from .models import GenerationProfile, RegisteredTemplate
+
+
+@admin.register(RegisteredTemplate)
+class RegisteredTemplateAdmin(admin.ModelAdmin):
+    list_display = ('name', 'version', 'is_default', 'upload', 'created_at')
+    list_filter = ('is_default',)
+    search_fields = ('name',)
+
+
+@admin.register(GenerationProfile)
+class GenerationProfileAdmin(admin.ModelAdmin):
+    list_display = ('job_id', 'created_at', 'duration', 'peak_memory_mb')
+    search_fields = ('job_id',)
+    readonly_fields = ('job_id', 'created_at', 'duration', 'peak_memory_mb', 'file', 'report_display')
+    exclude = ('report', 'peak_memory')
+
+    @admin.display(description='Pic mémoire (Mo)')
+    def peak_memory_mb(self, obj):
+        return round(obj.peak_memory / 1024 / 1024, 1)
+
+    @admin.display(description='Rapport')
+    def report_display(self, obj):
+        return format_html('<pre style="white-space: pre; font-size: 12px">{}</pre>', obj.report)
+
+    def has_add_permission(self, request):
+        return False
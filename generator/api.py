@@ -0,0 +1,181 @@
+import hmac
+import hashlib
+import json
+import logging
+import traceback
+from datetime import timedelta
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.urls import reverse
+from django.utils import timezone
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_POST
+
+from .models import ApiBatch
+from .pipeline import run_generation, save_profile
+from .registry import load_template, resolve_template
+from .utils.profiling import GenerationProfiler
+
+logger = logging.getLogger(__name__)
+
+# Longueur maximale d'une clé d'idempotence (ApiBatch.idempotency_key)
+IDEMPOTENCY_KEY_MAX_LENGTH = 128
+
+HEADER_FIELDS = ('cariste', 'fournisseur', 'numero_dossier', 'type_certification', 'numero_certificat')
+
+
+def _artifact(request, artifact_id):
+    if artifact_id is None:
+        return None
+    return {
+        'id': artifact_id,
+        'url': request.build_absolute_uri(reverse('download_artifact', args=[artifact_id])),
+    }
+
+
+def _check_token(request):
+    token = getattr(settings, 'API_TOKEN', '')
+    if not token:
+        return True
+    # Comparaison à temps constant : pas d'indice sur le jeton par la durée de la réponse
+    return hmac.compare_digest(request.headers.get('Authorization', '').encode(), f"Bearer {token}".encode())
+
+
+def _generate_dossier(request, dossier):
+    """Génère un dossier du lot à partir de ses lignes JSON, sans passer par Excel"""
+    import pandas as pd
+    from .utils.excel_processor import ExcelProcessor
+    from .utils.pdf_generator import PDFGenerator
+
+    rows = dossier.get('rows')
+    if not isinstance(rows, list) or not rows or not all(isinstance(row, dict) for row in rows):
+        return {'error': "'rows' doit être une liste non vide d'objets"}
+    template_id = dossier.get('template_id')
+    if template_id is not None and (not isinstance(template_id, int) or isinstance(template_id, bool)):
+        return {'error': "'template_id' doit être un entier"}
+    if not isinstance(dossier.get('template_name') or '', str):
+        return {'error': "'template_name' doit être une chaîne"}
+
+    registered = resolve_template(template_id=template_id, name=dossier.get('template_name'))
+    if registered is None:
+        return {'error': "Template introuvable (ni template_id, ni template par défaut)"}
+
+    processor = ExcelProcessor()
+    template = load_template(registered.upload, processor)
+    processor.set_template(template.name, positions=template.positions, content=template.content)
+
+    header_fields = {field: str(dossier.get(field, '') or '').strip() for field in HEADER_FIELDS}
+    profiler = GenerationProfiler(enabled=bool(dossier.get('profile')) or getattr(settings, 'GENERATION_PROFILING', False))
+    with profiler:
+        prep_data, _ = processor.normalize_dataframe(pd.DataFrame.from_records(rows))
+        generation = run_generation(processor, PDFGenerator(), prep_data, template, header_fields)
+    if generation is None:
+        return {'error': "Aucun conteneur trouvé dans les lignes"}
+    save_profile(profiler, generation['job_id'], generation['session_dir'])
+
+    summary_result = generation['summary_result']
+    return {
+        'zip': _artifact(request, generation['zip_id']),
+        'summary': dict(generation['summary']['totals'],
+                        excel=_artifact(request, summary_result['excel_id']),
+                        pdf=_artifact(request, summary_result['pdf_id']),
+                        manifest=_artifact(request, summary_result['manifest_id'])),
+        'containers': [{
+            'container': result['container'],
+            'reused': result['reused'],
+            'summary': result['summary'],
+            'excel': _artifact(request, result['excel_id']),
+            'pdf': _artifact(request, result['pdf_id']),
+        } for result in generation['results']],
+    }
+
+
+def _generate_dossier_safely(request, dossier, key):
+    """Un dossier en échec n'interrompt pas le lot : son erreur figure dans la réponse"""
+    try:
+        return _generate_dossier(request, dossier)
+    except Exception as e:
+        logger.error(f"Erreur API lot {key}, dossier {dossier.get('numero_dossier', '')}: {traceback.format_exc()}")
+        return {'error': f"Erreur de génération : {e}"}
+
+
+def _claim_stale_batch(batch):
+    """
+    Reprend un lot sans réponse dont le traitement a commencé il y a plus de
+    API_BATCH_STALE_AFTER secondes. Mise à jour conditionnelle : deux
+    reprises simultanées ne peuvent pas toutes deux l'obtenir.
+    """
+    stale_after = timedelta(seconds=getattr(settings, 'API_BATCH_STALE_AFTER', 600))
+    now = timezone.now()
+    if now - batch.started_at < stale_after:
+        return False
+    claimed = (ApiBatch.objects.filter(pk=batch.pk, response__isnull=True, started_at=batch.started_at)
+               .update(started_at=now))
+    batch.started_at = now
+    return bool(claimed)
+
+
+@csrf_exempt
+@require_POST
+def api_batches(request):
+    """
+    Génère plusieurs dossiers depuis un JSON :
+    {"idempotency_key": "...", "dossiers": [{"numero_dossier": ..., "rows": [{...}, ...]}, ...]}
+
+    La clé d'idempotence (champ ou en-tête Idempotency-Key) rejoue la réponse
+    du premier appel ; une clé réutilisée avec un autre contenu est refusée.
+    Un lot resté sans réponse au-delà de API_BATCH_STALE_AFTER (worker tué en
+    cours de traitement) est repris par l'appel suivant.
+    """
+    if not _check_token(request):
+        return JsonResponse({'error': "Jeton d'API invalide"}, status=401)
+
+    try:
+        payload = json.loads(request.body)
+    except (ValueError, UnicodeDecodeError):
+        return JsonResponse({'error': 'JSON invalide'}, status=400)
+
+    key = request.headers.get('Idempotency-Key') or (payload.get('idempotency_key') if isinstance(payload, dict) else None)
+    dossiers = payload.get('dossiers') if isinstance(payload, dict) else None
+    if not key:
+        return JsonResponse({'error': "'idempotency_key' est obligatoire"}, status=400)
+    if not isinstance(key, str) or len(key) > IDEMPOTENCY_KEY_MAX_LENGTH:
+        return JsonResponse({'error': f"'idempotency_key' doit être une chaîne de {IDEMPOTENCY_KEY_MAX_LENGTH} caractères au plus"}, status=400)
+    if not isinstance(dossiers, list) or not dossiers or not all(isinstance(d, dict) for d in dossiers):
+        return JsonResponse({'error': "'dossiers' doit être une liste non vide d'objets"}, status=400)
+
+    payload_sha256 = hashlib.sha256(
+        json.dumps(dossiers, sort_keys=True, default=str).encode()).hexdigest()
+    try:
+        # Savepoint : la requête reste utilisable après l'IntegrityError (ATOMIC_REQUESTS, tests)
+        with transaction.atomic():
+            batch = ApiBatch.objects.create(idempotency_key=key, payload_sha256=payload_sha256)
+    except IntegrityError:
+        batch = ApiBatch.objects.get(idempotency_key=key)
+        if batch.payload_sha256 != payload_sha256:
+            return JsonResponse({'error': "Clé d'idempotence déjà utilisée pour un autre lot"}, status=409)
+        if batch.response is not None:
+            return JsonResponse(batch.response)
+        if not _claim_stale_batch(batch):
+            return JsonResponse({'error': 'Lot en cours de traitement'}, status=409)
+        logger.warning(f"API : lot {key} resté sans réponse, repris")
+
+    logger.info(f"API : lot {key} ({len(dossiers)} dossiers)")
+    try:
+        response = {
+            'idempotency_key': key,
+            'dossiers': [dict(_generate_dossier_safely(request, dossier, key),
+                              numero_dossier=dossier.get('numero_dossier', ''))
+                         for dossier in dossiers],
+        }
+    except Exception as e:
+        logger.error(f"Erreur API lot {key}: {traceback.format_exc()}")
+        # Le lot n'a pas abouti : la clé redevient utilisable
+        batch.delete()
+        return JsonResponse({'error': str(e)}, status=500)
+
+    batch.response = response
+    batch.save(update_fields=['response'])
+    return JsonResponse(response, status=201)
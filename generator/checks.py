@@ -0,0 +1,20 @@
+import sys
+
+from django.conf import settings
+from django.core import checks
+
+
+@checks.register()
+def check_pdf_converter(app_configs, **kwargs):
+    """Signale au démarrage un convertisseur LibreOffice sans binaire soffice"""
+    name = getattr(settings, 'PDF_CONVERTER', None) or ('win32com' if sys.platform == 'win32' else 'libreoffice')
+    if name != 'libreoffice':
+        return []
+    from .utils.pdf_generator import libreoffice_binary
+    if libreoffice_binary(getattr(settings, 'LIBREOFFICE_BINARY', None)):
+        return []
+    return [checks.Warning(
+        "LibreOffice (soffice) est introuvable : tous les PDF seront « Non généré ».",
+        hint="Installez libreoffice-calc ou renseignez LIBREOFFICE_BINARY / PDF_CONVERTER.",
+        id='generator.W001',
+    )]
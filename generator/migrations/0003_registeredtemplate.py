@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:41
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0002_uploadedfile_position_map'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RegisteredTemplate',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100)),
+                ('version', models.PositiveIntegerField(default=1)),
+                ('is_default', models.BooleanField(default=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('upload', models.ForeignKey(on_delete=django.db.models.deletion.PROTECT, related_name='registrations', to='generator.uploadedfile')),
+            ],
+            options={
+                'ordering': ['name', '-version'],
+                'unique_together': {('name', 'version')},
+            },
+        ),
+    ]
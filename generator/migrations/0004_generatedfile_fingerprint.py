@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:42
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0003_registeredtemplate'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedfile',
+            name='fingerprint',
+            field=models.CharField(blank=True, db_index=True, max_length=64),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0004_generatedfile_fingerprint'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApiBatch',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('idempotency_key', models.CharField(max_length=128, unique=True)),
+                ('payload_sha256', models.CharField(max_length=64)),
+                ('response', models.JSONField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='generatedfile',
+            name='file_type',
+            field=models.CharField(choices=[('excel', 'Fichier Excel'), ('pdf', 'Fichier PDF'), ('zip', 'Archive ZIP')], max_length=10),
+        ),
+    ]
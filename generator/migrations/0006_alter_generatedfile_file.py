@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:48
+
+from django.db import migrations, models
+import generator.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0005_apibatch_alter_generatedfile_file_type'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='generatedfile',
+            name='file',
+            field=models.FileField(storage=generator.models.artifact_storage, upload_to='generated/'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:49
+
+from django.db import migrations, models
+import generator.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0006_alter_generatedfile_file'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='GenerationProfile',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('job_id', models.CharField(db_index=True, max_length=100)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('duration', models.FloatField()),
+                ('peak_memory', models.BigIntegerField()),
+                ('report', models.TextField()),
+                ('file', models.FileField(blank=True, storage=generator.models.artifact_storage, upload_to='generated/')),
+            ],
+        ),
+    ]
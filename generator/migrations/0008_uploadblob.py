@@ -0,0 +1,29 @@
+# Generated by Django 4.2.7 on 2026-10-19 08:56
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0007_generationprofile'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UploadBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('file', models.FileField(upload_to='uploads/blobs/')),
+                ('size', models.BigIntegerField()),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='uploadedfile',
+            name='blob',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.PROTECT, related_name='uploads', to='generator.uploadblob'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:03
+
+from django.db import migrations, models
+import generator.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0008_uploadblob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='generatedfile',
+            name='preview',
+            field=models.FileField(blank=True, storage=generator.models.artifact_storage, upload_to='previews/'),
+        ),
+        migrations.AddField(
+            model_name='generatedfile',
+            name='preview_used_at',
+            field=models.DateTimeField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:23
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0009_generatedfile_preview'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='apibatch',
+            name='started_at',
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:24
+
+from django.db import migrations, models
+import generator.models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0010_apibatch_started_at'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='uploadblob',
+            name='file',
+            field=models.FileField(storage=generator.models.artifact_storage, upload_to='uploads/blobs/'),
+        ),
+        migrations.AlterField(
+            model_name='uploadedfile',
+            name='file',
+            field=models.FileField(storage=generator.models.artifact_storage, upload_to='uploads/'),
+        ),
+    ]
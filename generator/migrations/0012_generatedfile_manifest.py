@@ -0,0 +1,18 @@
+# Generated by Django 4.2.7 on 2026-10-19 09:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('generator', '0011_uploads_artifact_storage'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='generatedfile',
+            name='file_type',
+            field=models.CharField(choices=[('excel', 'Fichier Excel'), ('pdf', 'Fichier PDF'), ('zip', 'Archive ZIP'), ('manifest', 'Manifeste JSON')], max_length=10),
+        ),
+    ]
@@ -1,16 +1,37 @@
 from django.db import models
+from django.utils import timezone
+from django.core.files.storage import storages
 import os
 
+def artifact_storage():
+    """Stockage des fichiers générés (settings.STORAGES['artifacts'])"""
+    return storages['artifacts']
+
+class UploadBlob(models.Model):
+    """Contenu d'upload stocké une seule fois, adressé par son SHA-256"""
+    sha256 = models.CharField(max_length=64, unique=True)
+    file = models.FileField(upload_to='uploads/blobs/', storage=artifact_storage)
+    size = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"{self.sha256[:12]} ({self.size} octets)"
+
 class UploadedFile(models.Model):
     FILE_TYPE_CHOICES = [
         ('Préparation_PL', 'Fichier Préparation PL'),
         ('zzzz', 'Fichier zzzz'),
     ]
     
-    file = models.FileField(upload_to='uploads/')
+    # Stockage partagé : un template enregistré sur un nœud est lisible depuis tous
+    file = models.FileField(upload_to='uploads/', storage=artifact_storage)
     file_type = models.CharField(max_length=20, choices=FILE_TYPE_CHOICES)
     uploaded_at = models.DateTimeField(auto_now_add=True)
     original_name = models.CharField(max_length=255)
+    # Carte de positions compilée à l'upload (templates zzzz uniquement)
+    position_map = models.JSONField(null=True, blank=True)
+    # Contenu partagé : `file` pointe sur le fichier du blob (vide pour les anciens uploads)
+    blob = models.ForeignKey(UploadBlob, null=True, blank=True, on_delete=models.PROTECT, related_name='uploads')
 
     def __str__(self):
         return f"{self.file_type} - {self.original_name}"
@@ -19,15 +40,61 @@ class GeneratedFile(models.Model):
     FILE_TYPE_CHOICES = [
         ('excel', 'Fichier Excel'),
         ('pdf', 'Fichier PDF'),
+        ('zip', 'Archive ZIP'),
+        ('manifest', 'Manifeste JSON'),
     ]
     
-    file = models.FileField(upload_to='generated/')
+    file = models.FileField(upload_to='generated/', storage=artifact_storage)
     file_type = models.CharField(max_length=10, choices=FILE_TYPE_CHOICES)
     container_name = models.CharField(max_length=100)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Empreinte lignes + en-têtes + template, pour la régénération incrémentale
+    fingerprint = models.CharField(max_length=64, blank=True, db_index=True)
+    # Vignette PNG de la première page, rendue à la demande (cache évincé LRU)
+    preview = models.FileField(upload_to='previews/', storage=artifact_storage, blank=True)
+    preview_used_at = models.DateTimeField(null=True, blank=True, db_index=True)
 
     def __str__(self):
         return f"{self.container_name} - {self.file_type}"
     
     def filename(self):
-        return os.path.basename(self.file.name)
\ No newline at end of file
+        return os.path.basename(self.file.name)
+
+class RegisteredTemplate(models.Model):
+    """Template zzzz enregistré une fois, versionné et sélectionnable par nom/id"""
+    name = models.CharField(max_length=100)
+    version = models.PositiveIntegerField(default=1)
+    upload = models.ForeignKey(UploadedFile, on_delete=models.PROTECT, related_name='registrations')
+    is_default = models.BooleanField(default=False)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        unique_together = ('name', 'version')
+        ordering = ['name', '-version']
+
+    def __str__(self):
+        return f"{self.name} v{self.version}"
+
+class ApiBatch(models.Model):
+    """Lot reçu par l'API JSON, rejoué à l'identique pour une même clé d'idempotence"""
+    idempotency_key = models.CharField(max_length=128, unique=True)
+    payload_sha256 = models.CharField(max_length=64)
+    response = models.JSONField(null=True, blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    # Début du traitement en cours (repris si le worker meurt avant la réponse)
+    started_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return self.idempotency_key
+
+class GenerationProfile(models.Model):
+    """Profil (CPU + mémoire) d'une génération lancée en mode profilage"""
+    job_id = models.CharField(max_length=100, db_index=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    duration = models.FloatField()
+    peak_memory = models.BigIntegerField()
+    report = models.TextField()
+    file = models.FileField(upload_to='generated/', storage=artifact_storage, blank=True)
+
+    def __str__(self):
+        return f"Profil {self.job_id} ({self.duration:.1f}s)"
@@ -0,0 +1,322 @@
+import os
+import shutil
+import logging
+import threading
+import time
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+
+from .models import GeneratedFile, GenerationProfile
+from .storage import local_copy
+from .utils.pl_cache import ParsedPLCache
+from .utils.workspace import MANIFEST_NAME, JobWorkspace, atomic_path
+
+logger = logging.getLogger(__name__)
+
+
+# Générations en cours dans ce processus (readiness)
+_in_flight_lock = threading.Lock()
+_in_flight = 0
+
+
+def in_flight_generations():
+    """Nombre de générations en cours dans ce processus (worker)"""
+    return _in_flight
+
+
+@contextmanager
+def _generation_in_flight():
+    global _in_flight
+    with _in_flight_lock:
+        _in_flight += 1
+    try:
+        yield
+    finally:
+        with _in_flight_lock:
+            _in_flight -= 1
+
+
+def load_preparation(processor, upload):
+    """
+    Lit et normalise le Preparation PL d'un upload ; un contenu déjà lu
+    (même SHA-256) est repris du cache disque sans re-parsing.
+    Retourne (DataFrame, colonnes) comme ExcelProcessor.read_input_file().
+    """
+    cache = ParsedPLCache(
+        getattr(settings, 'PL_CACHE_DIR', os.path.join(settings.MEDIA_ROOT, 'cache', 'pl')),
+        getattr(settings, 'PL_CACHE_MAX_SIZE', 0),
+    )
+    sha256 = upload.blob.sha256 if upload.blob_id else None
+    if sha256 and cache.enabled:
+        cached = cache.get(sha256)
+        if cached is not None:
+            prep_data, processor.container_column = cached
+            return prep_data, list(prep_data.columns)
+
+    with local_copy(upload.file) as path:
+        prep_data, columns = processor.read_input_file(path)
+    if sha256 and cache.enabled:
+        # Les lectures suivantes viendront du cache : mêmes types dès maintenant
+        # (sinon les empreintes des conteneurs différeraient d'une fois sur l'autre)
+        cached = cache.put(sha256, prep_data, processor.container_column)
+        if cached is not None:
+            prep_data = cached
+    return prep_data, columns
+
+
+def run_generation(processor, pdf_generator, prep_data, template, header_fields):
+    """
+    Génère les fichiers d'un dossier à partir d'un PL déjà chargé :
+    extraction des conteneurs, Excel (ou réutilisation), PDF en lot,
+    ZIP de session, puis publication dans le stockage d'artefacts.
+
+    `header_fields` : cariste, fournisseur, numero_dossier, type_certification,
+    numero_certificat. Retourne None si aucun conteneur n'est trouvé.
+    """
+    with _generation_in_flight():
+        containers = processor.extract_containers(prep_data)
+        logger.info(f"Conteneurs trouvés : {containers}")
+        if not containers:
+            return None
+
+        # Dossier principal
+        base_output_dir = getattr(settings, 'CUSTOM_DOWNLOAD_DIR',
+                                  os.path.join(settings.MEDIA_ROOT, 'generated'))
+
+        #  Espace de travail unique au job (jamais partagé entre deux uploads)
+        workspace = JobWorkspace(base_output_dir)
+        logger.info(f"Dossier session : {workspace.path}")
+        try:
+            return _generate(processor, pdf_generator, prep_data, template, header_fields, containers, workspace)
+        except Exception:
+            # Échec avant publication : rien n'est téléchargeable, l'espace ne sert plus
+            if not workspace.published:
+                logger.warning(f"Job {workspace.job_id} en échec, espace de travail supprimé")
+                workspace.discard()
+            raise
+
+
+def _generate(processor, pdf_generator, prep_data, template, header_fields, containers, workspace):
+    """Corps de run_generation, dans l'espace de travail du job"""
+    session_dir = workspace.path
+
+    # Champs d'en-tête inclus dans l'empreinte de chaque conteneur
+    fingerprint_fields = dict(header_fields, date=datetime.now().strftime('%d/%m/%Y'))
+
+    results = []
+
+    # Traitement de chaque conteneur
+    logger.info(f"Traitement de {len(containers)} conteneurs")
+    for i, container in enumerate(containers):
+        container_start = time.time()
+
+        container_data = processor.filter_by_container(prep_data, container)
+        logger.debug(f"Conteneur {i + 1}/{len(containers)} {container} : {len(container_data)} bobines")
+
+        fingerprint = processor.container_fingerprint(container_data, fingerprint_fields, template.sha256)
+        excel_path = None
+        pdf_path = None
+
+        #  Conteneur inchangé : réutilisation des fichiers précédents
+        reused = _reuse_previous_artifacts(fingerprint, container, session_dir)
+        if reused:
+            excel_path, pdf_path = reused
+        else:
+            #  Génération Excel
+            excel_path = processor.create_excel(
+                data=container_data,
+                container=container,
+                output_dir=session_dir,
+                **header_fields
+            )
+            if excel_path:
+                logger.debug(f"Excel généré : {os.path.basename(excel_path)}")
+            else:
+                logger.warning(f"Excel du conteneur {container} non généré")
+
+        #  Ajout des résultats (PDF converti ensuite en un seul lot)
+        results.append({
+            'container': container,
+            'fingerprint': fingerprint,
+            'excel_path': excel_path,
+            'pdf_path': pdf_path,
+            'reused': bool(reused),
+        })
+
+        container_time = time.time() - container_start
+        logger.debug(f"Conteneur {container} traité en {container_time:.2f}s")
+
+    #  Récapitulatif du dossier : agrégats de tous les conteneurs en un seul groupby
+    summary = processor.summarize_containers(prep_data)
+    stats = {entry['container']: entry for entry in summary['containers']}
+    for result in results:
+        result['summary'] = stats.get(result['container'], {})
+    summary_result = _build_summary(processor, summary, results, fingerprint_fields, session_dir)
+
+    #  Génération PDF : tous les Excel régénérés (récapitulatif compris) en un lot
+    to_convert = [r['excel_path'] for r in results + [summary_result] if r['excel_path'] and not r['reused']]
+    if to_convert:
+        logger.info(f"Génération PDF ({len(to_convert)} fichiers)")
+        pdf_paths = pdf_generator.convert_many(to_convert, session_dir)
+        for result in results + [summary_result]:
+            if not result['reused'] and result['excel_path']:
+                result['pdf_path'] = pdf_paths.get(result['excel_path'])
+                if result['pdf_path']:
+                    logger.debug(f"PDF généré : {os.path.basename(result['pdf_path'])}")
+                else:
+                    logger.warning(f"PDF du conteneur {result['container']} non généré")
+
+    # ⭐ ÉTAPE 6: Création ZIP, puis publication (manifeste écrit en dernier)
+    zip_path = create_session_zip(workspace)
+    workspace.publish(extra={'summary': summary})
+
+    #  Publication dans le stockage d'artefacts + enregistrement dans la base
+    for result in results + [summary_result]:
+        excel_path, pdf_path = result['excel_path'], result['pdf_path']
+        result['excel_id'] = result['pdf_id'] = None
+        if excel_path:
+            result['excel_id'] = _publish_artifact(
+                workspace, excel_path, 'excel', result['container'], result['fingerprint']).pk
+        if pdf_path:
+            result['pdf_id'] = _publish_artifact(
+                workspace, pdf_path, 'pdf', result['container'], result['fingerprint']).pk
+        result['excel_filename'] = os.path.basename(excel_path) if excel_path else 'Non généré'
+        result['pdf_filename'] = os.path.basename(pdf_path) if pdf_path else 'Non généré'
+
+    # Manifeste (récapitulatif JSON du dossier) : publié comme les fichiers qu'il décrit
+    summary_result['manifest_id'] = _publish_artifact(
+        workspace, workspace.file_path(MANIFEST_NAME), 'manifest', os.path.basename(session_dir)).pk
+
+    zip_file = _publish_artifact(workspace, zip_path, 'zip', os.path.basename(session_dir))
+
+    # Stockage distant : l'espace local n'était qu'un brouillon
+    if not _is_local_storage(zip_file.file.storage):
+        shutil.rmtree(session_dir, ignore_errors=True)
+
+    return {
+        'containers': containers,
+        'results': results,
+        'session_dir': session_dir,
+        'zip_path': zip_path,
+        'zip_id': zip_file.pk,
+        'job_id': workspace.job_id,
+        'summary': summary,
+        'summary_result': summary_result,
+    }
+
+
+def _build_summary(processor, summary, results, header_fields, session_dir):
+    """Excel récapitulatif du dossier, réutilisé tel quel si aucun conteneur n'a changé"""
+    from .utils.excel_processor import SUMMARY_NAME as name
+    fingerprint = processor.summary_fingerprint([[r['container'], r['fingerprint']] for r in results])
+    reused = _reuse_previous_artifacts(fingerprint, name, session_dir)
+    if reused:
+        excel_path, pdf_path = reused
+    else:
+        excel_path, pdf_path = processor.create_summary_excel(summary, session_dir, header_fields), None
+    return {
+        'container': name,
+        'fingerprint': fingerprint,
+        'excel_path': excel_path,
+        'pdf_path': pdf_path,
+        'reused': bool(reused),
+    }
+
+
+def save_profile(profiler, job_id, session_dir=None):
+    """
+    Stocke le profil d'une génération à côté de ses fichiers (GenerationProfile) :
+    dans le dossier de session en stockage local, sous le même préfixe que
+    les artefacts du job sinon.
+    """
+    if not profiler.enabled:
+        return None
+    profile = GenerationProfile(
+        job_id=job_id,
+        duration=profiler.duration,
+        peak_memory=profiler.peak_memory,
+        report=profiler.report,
+    )
+    if profiler.raw:
+        filename = f"profile.{profiler.raw_extension}"
+        if session_dir and os.path.isdir(session_dir) and _is_local_storage(profile.file.storage):
+            path = os.path.join(session_dir, filename)
+            with atomic_path(path) as tmp_path:
+                with open(tmp_path, 'wb') as f:
+                    f.write(profiler.raw)
+            _store_artifact(profile.file, job_id, path)
+        else:
+            profile.file.save(f"{job_id}/{filename}", ContentFile(profiler.raw), save=False)
+    profile.save()
+    logger.info(f"Profil du job {job_id} enregistré")
+    return profile
+
+
+def _is_local_storage(storage):
+    return isinstance(storage, FileSystemStorage)
+
+
+def _store_artifact(field_file, job_id, path):
+    """Range un fichier du workspace dans le stockage d'artefacts (sans ligne en base)"""
+    storage = field_file.storage
+    location = os.path.abspath(storage.location) if _is_local_storage(storage) else None
+    if location and os.path.abspath(path).startswith(location + os.sep):
+        # Stockage local : le fichier est déjà à sa place définitive
+        field_file.name = os.path.relpath(path, location).replace(os.sep, '/')
+    else:
+        with open(path, 'rb') as f:
+            field_file.save(f"{job_id}/{os.path.basename(path)}", File(f), save=False)
+
+
+def _publish_artifact(workspace, path, file_type, container_name, fingerprint=''):
+    """
+    Enregistre un fichier publié du workspace dans le stockage d'artefacts.
+    La ligne GeneratedFile n'est créée qu'une fois le fichier complet stocké.
+    """
+    generated = GeneratedFile(file_type=file_type, container_name=container_name, fingerprint=fingerprint)
+    _store_artifact(generated.file, workspace.job_id, path)
+    generated.save()
+    return generated
+
+
+def _reuse_previous_artifacts(fingerprint, container, session_dir):
+    """
+    Copie dans la session l'Excel et le PDF d'une génération précédente de même
+    empreinte. Retourne (excel_path, pdf_path) ou None s'il faut régénérer.
+    """
+    previous = {}
+    for generated in GeneratedFile.objects.filter(fingerprint=fingerprint).order_by('-created_at'):
+        if generated.file_type not in previous and generated.file.storage.exists(generated.file.name):
+            previous[generated.file_type] = generated
+    if 'excel' not in previous or 'pdf' not in previous:
+        return None
+
+    paths = []
+    for file_type, extension in (('excel', 'xlsx'), ('pdf', 'pdf')):
+        target = os.path.join(session_dir, f"{container}.{extension}")
+        with atomic_path(target) as tmp_path, previous[file_type].file.open('rb') as src, open(tmp_path, 'wb') as dst:
+            shutil.copyfileobj(src, dst)
+        paths.append(target)
+    logger.info(f"Conteneur {container} inchangé ({fingerprint[:12]}), fichiers réutilisés")
+    return tuple(paths)
+
+
+def create_session_zip(workspace):
+    """Crée, dans l'espace du job, un ZIP contenant tous ses fichiers Excel/PDF."""
+    zip_filename = f"fichiers_conteneurs_{workspace.job_id}.zip"
+    zip_path = workspace.file_path(zip_filename)
+
+    files = workspace.artifacts()
+    with atomic_path(zip_path) as tmp_path:
+        with zipfile.ZipFile(tmp_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
+            for file in files:
+                zipf.write(workspace.file_path(file), file)
+
+    logger.info(f"ZIP {zip_filename} créé avec {len(files)} fichiers")
+    return zip_path
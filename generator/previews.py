@@ -0,0 +1,79 @@
+import logging
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.utils import timezone
+
+from .models import GeneratedFile
+from .storage import local_copy
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand le rendu change : nouvelles URL/ETag, anciens caches navigateur ignorés
+PREVIEW_VERSION = 1
+
+# Granularité de la date de dernier usage (évite une écriture en base à chaque affichage)
+PREVIEW_TOUCH_AFTER = timedelta(hours=1)
+
+
+def _render(generated):
+    """PNG de la première page : PDF rastérisé, sinon rendu depuis l'Excel du conteneur"""
+    from .utils.preview import excel_png, pdf_first_page_png
+
+    if generated.file_type == 'pdf':
+        with local_copy(generated.file) as path:
+            png = pdf_first_page_png(path)
+        if png:
+            return png
+        # Pas de rastériseur : l'Excel de même empreinte porte les mêmes données
+        generated = (GeneratedFile.objects
+                     .filter(file_type='excel', container_name=generated.container_name,
+                             fingerprint=generated.fingerprint)
+                     .exclude(fingerprint='').order_by('-created_at').first())
+        if generated is None:
+            return None
+    if generated.file_type == 'excel':
+        with local_copy(generated.file) as path:
+            return excel_png(path)
+    return None
+
+
+def get_preview(generated):
+    """
+    Vignette PNG d'un artefact (FieldFile), rendue une seule fois puis
+    gardée dans le stockage d'artefacts. None si aucun rendu n'est possible.
+    """
+    now = timezone.now()
+    if generated.preview and generated.preview.storage.exists(generated.preview.name):
+        if not generated.preview_used_at or now - generated.preview_used_at > PREVIEW_TOUCH_AFTER:
+            GeneratedFile.objects.filter(pk=generated.pk).update(preview_used_at=now)
+        return generated.preview
+
+    png = _render(generated)
+    if not png:
+        return None
+
+    name = generated.preview.storage.save(f"previews/{generated.pk}_v{PREVIEW_VERSION}.png", ContentFile(png))
+    # Deux rendus simultanés : seul le premier enregistré est gardé
+    claimed = (GeneratedFile.objects.filter(pk=generated.pk, preview=generated.preview.name or '')
+               .update(preview=name, preview_used_at=now))
+    if not claimed:
+        generated.preview.storage.delete(name)
+        generated.refresh_from_db(fields=['preview', 'preview_used_at'])
+        return generated.preview
+    logger.info(f"Aperçu {name} rendu ({len(png)} octets)")
+    generated.preview.name, generated.preview_used_at = name, now
+    evict_previews()
+    return generated.preview
+
+
+def evict_previews(max_files=None):
+    """Supprime les vignettes les moins récemment affichées au-delà de PREVIEW_CACHE_MAX_FILES"""
+    if max_files is None:
+        max_files = getattr(settings, 'PREVIEW_CACHE_MAX_FILES', 5000)
+    cached = GeneratedFile.objects.exclude(preview='').order_by('-preview_used_at')
+    for generated in cached[max_files:]:
+        generated.preview.delete(save=False)
+        GeneratedFile.objects.filter(pk=generated.pk).update(preview='', preview_used_at=None)
+        logger.info(f"Aperçu de l'artefact {generated.pk} évincé")
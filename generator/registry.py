@@ -0,0 +1,118 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+
+from django.db import IntegrityError, transaction
+from django.db.models import Max
+
+from .models import RegisteredTemplate
+from .storage import local_copy
+
+logger = logging.getLogger(__name__)
+
+# Nombre de templates gardés chauds en mémoire par processus
+TEMPLATE_CACHE_SIZE = 8
+
+# Essais d'enregistrement quand la version calculée est prise par une requête concurrente
+REGISTER_ATTEMPTS = 5
+
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class CachedTemplate:
+    """Template déjà lu et compilé : contenu brut + carte de positions"""
+    upload_id: int
+    # Nom dans le stockage partagé (le contenu est en mémoire, aucun chemin local)
+    name: str
+    content: bytes
+    positions: dict
+    sha256: str
+
+
+def register_template(upload, name, make_default=False):
+    """
+    Enregistre un upload zzzz sous `name` en créant une nouvelle version.
+    Deux enregistrements simultanés du même nom calculent la même version :
+    le perdant (IntegrityError sur nom + version) réessaie avec la suivante.
+    """
+    for attempt in range(REGISTER_ATTEMPTS):
+        last = RegisteredTemplate.objects.filter(name=name).aggregate(v=Max('version'))['v']
+        try:
+            with transaction.atomic():
+                if make_default:
+                    RegisteredTemplate.objects.filter(is_default=True).update(is_default=False)
+                template = RegisteredTemplate.objects.create(
+                    name=name,
+                    version=(last or 0) + 1,
+                    upload=upload,
+                    is_default=make_default,
+                )
+            break
+        except IntegrityError:
+            if attempt == REGISTER_ATTEMPTS - 1:
+                raise
+            logger.info(f"Version {(last or 0) + 1} de {name} prise entre-temps, nouvel essai")
+    logger.info(f"Template enregistré : {template} (défaut={make_default})")
+    return template
+
+
+def resolve_template(template_id=None, name=None):
+    """
+    Retrouve un template enregistré par id, puis par nom (dernière version),
+    sinon retombe sur le template par défaut. Retourne None si aucun.
+    """
+    queryset = RegisteredTemplate.objects.select_related('upload__blob')
+    if template_id:
+        return queryset.filter(pk=template_id).first()
+    if name:
+        return queryset.filter(name=name).order_by('-version').first()
+    return queryset.filter(is_default=True).order_by('-created_at').first()
+
+
+def load_template(upload, processor=None):
+    """
+    Retourne le CachedTemplate d'un upload zzzz depuis le cache du processus.
+    Au premier accès le fichier est lu et, si besoin, compilé puis persisté.
+    """
+    # Clé = fichier stocké : les uploads d'un même blob partagent l'entrée
+    key = upload.file.name
+    with _cache_lock:
+        cached = _cache.get(key)
+        if cached is not None:
+            _cache.move_to_end(key)
+            return cached
+
+    with upload.file.open('rb') as f:
+        content = f.read()
+
+    positions = upload.position_map
+    if not positions:
+        from .utils.excel_processor import ExcelProcessor
+        with local_copy(upload.file) as path:
+            positions = (processor or ExcelProcessor()).compile_template(path)
+        upload.position_map = positions
+        upload.save(update_fields=['position_map'])
+
+    cached = CachedTemplate(
+        upload_id=upload.pk,
+        name=upload.file.name,
+        content=content,
+        positions=positions,
+        sha256=upload.blob.sha256 if upload.blob_id else hashlib.sha256(content).hexdigest(),
+    )
+    with _cache_lock:
+        _cache[key] = cached
+        _cache.move_to_end(key)
+        while len(_cache) > TEMPLATE_CACHE_SIZE:
+            _cache.popitem(last=False)
+    logger.info(f"Template {upload.original_name} chargé en cache ({len(content)} octets)")
+    return cached
+
+
+def available_templates():
+    """Templates proposés dans le formulaire"""
+    return RegisteredTemplate.objects.select_related('upload').order_by('name', '-version')
@@ -0,0 +1,25 @@
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+from django.core.files.storage import FileSystemStorage
+
+
+@contextmanager
+def local_copy(field_file):
+    """
+    Chemin local d'un fichier du stockage : le fichier lui-même si le stockage
+    est local, sinon une copie temporaire (même extension) supprimée en sortie.
+    """
+    if isinstance(field_file.storage, FileSystemStorage):
+        yield field_file.path
+        return
+    extension = os.path.splitext(field_file.name)[1]
+    with tempfile.NamedTemporaryFile(suffix=extension, delete=False) as tmp:
+        with field_file.open('rb') as src:
+            shutil.copyfileobj(src, tmp)
+    try:
+        yield tmp.name
+    finally:
+        os.remove(tmp.name)
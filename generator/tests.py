@@ -1,3 +1,261 @@
-from django.test import TestCase
+import hashlib
+import json
+import shutil
+import tempfile
+from datetime import timedelta
+from io import BytesIO
+from unittest import mock
 
-# Create your tests here.
+import openpyxl
+import pandas as pd
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from . import registry
+from .models import ApiBatch, GeneratedFile, RegisteredTemplate, UploadBlob, UploadedFile
+from .registry import register_template, resolve_template
+from .uploads import discard_upload, store_upload
+from .utils import pdf_generator
+from .utils.pdf_generator import PDFConverter
+
+HEADERS = ["N°", "N° FOURNISSEUR", "FOURNISSEUR", "CODE BARRE", "REF PAPIER",
+           "DIAM", "POIDS", "N° CERTIFICAT FSC", "TYPE CERTIFICATION"]
+
+
+class FakePDFConverter(PDFConverter):
+    """Convertisseur de test (PDF_CONVERTER) : écrit un PDF factice et note chaque Excel converti"""
+    converted = []
+
+    def convert(self, excel_path, pdf_path):
+        FakePDFConverter.converted.append(excel_path)
+        with open(pdf_path, 'wb') as f:
+            f.write(b'%PDF-1.4 test')
+        return pdf_path
+
+
+def build_template(ambiguous=False):
+    """Template FO57 minimal ; `ambiguous` ajoute un second candidat au champ type de certification"""
+    workbook = openpyxl.Workbook()
+    sheet = workbook.active
+    sheet.title = "FO57"
+    sheet["A1"] = "FICHE RECEPTION TYPE FO57" if ambiguous else "FICHE RECEPTION"
+    sheet["A3"] = "CARISTE : "
+    sheet["D3"] = "DATE : "
+    sheet["A5"] = "N° CT : "
+    sheet["D5"] = "No. Dossier : "
+    for col, header in enumerate(HEADERS, 1):
+        sheet.cell(row=14, column=col, value=header)
+    for row in range(15, 20):
+        sheet.cell(row=row, column=1, value=row - 14)
+    buffer = BytesIO()
+    workbook.save(buffer)
+    return buffer.getvalue()
+
+
+def build_pl(weights=None):
+    """PL de 3 conteneurs (CT0 à CT2) x 4 bobines ; `weights` remplace des poids par index de ligne"""
+    data = pd.DataFrame({
+        "CONTAINER": [f"CT{i % 3}" for i in range(12)],
+        "REEL NO.": [f"B25{i:03d}-2A" for i in range(12)],
+        "REF PAPIER": ["KRAFT120"] * 12,
+        "DIAM MM": [1000 + i for i in range(12)],
+        "POIDS (KG)": [500 + i for i in range(12)],
+    })
+    for index, weight in (weights or {}).items():
+        data.loc[index, "POIDS (KG)"] = weight
+    buffer = BytesIO()
+    data.to_excel(buffer, index=False)
+    return buffer.getvalue()
+
+
+class GeneratorTestCase(TestCase):
+    """MEDIA_ROOT temporaire, convertisseur factice et caches de processus vidés"""
+
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root, ignore_errors=True)
+        settings_override = override_settings(
+            MEDIA_ROOT=self.media_root,
+            PL_CACHE_DIR=f"{self.media_root}/cache/pl",
+            PDF_CONVERTER='generator.tests.FakePDFConverter',
+            API_TOKEN='',
+            GENERATION_PROFILING=False,
+        )
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        converter = mock.patch.object(pdf_generator, '_converter', None)
+        converter.start()
+        self.addCleanup(converter.stop)
+        registry._cache.clear()
+        FakePDFConverter.converted = []
+
+    def post_upload(self, pl, template=None, **fields):
+        data = {
+            'cariste': 'Jean', 'fournisseur': 'PAPETERIE', 'numero_dossier': 'D1',
+            'type_certification': 'FSC MIX', 'numero_certificat': 'C-1',
+            'preparation_pl': SimpleUploadedFile('pl.xlsx', pl),
+        }
+        if template is not None:
+            data['zzz_file'] = SimpleUploadedFile('zzzz.xlsx', template)
+        data.update(fields)
+        return self.client.post(reverse('home'), data)
+
+    def messages(self, response):
+        return [str(message) for message in response.context['messages']]
+
+
+class PipelineReuseTests(GeneratorTestCase):
+
+    def test_unchanged_containers_are_reused(self):
+        template = build_template()
+        first = self.post_upload(build_pl(), template)
+        self.assertEqual(first.context['rebuilt_containers'], ['CT0', 'CT1', 'CT2'])
+        self.assertEqual(len(FakePDFConverter.converted), 4)  # 3 conteneurs + récapitulatif
+
+        FakePDFConverter.converted = []
+        second = self.post_upload(build_pl(), template)
+        self.assertEqual(second.context['reused_containers'], ['CT0', 'CT1', 'CT2'])
+        self.assertEqual(FakePDFConverter.converted, [])
+
+    def test_only_changed_container_is_rebuilt(self):
+        template = build_template()
+        self.post_upload(build_pl(), template)
+        FakePDFConverter.converted = []
+
+        # Ligne 1 = conteneur CT1
+        response = self.post_upload(build_pl(weights={1: 999}), template)
+        self.assertEqual(response.context['rebuilt_containers'], ['CT1'])
+        self.assertEqual(response.context['reused_containers'], ['CT0', 'CT2'])
+        self.assertEqual(sorted(path.rsplit('/', 1)[-1] for path in FakePDFConverter.converted),
+                         ['CT1.xlsx', 'RECAPITULATIF.xlsx'])
+
+
+class TemplateValidationTests(GeneratorTestCase):
+
+    def test_ambiguous_template_is_rejected(self):
+        response = self.post_upload(build_pl(), build_template(ambiguous=True))
+        self.assertTrue(any(message.startswith("Template rejeté") for message in self.messages(response)))
+        self.assertFalse(UploadedFile.objects.filter(file_type='zzzz').exists())
+        self.assertEqual(UploadBlob.objects.count(), 1)  # le PL seul
+        self.assertFalse(GeneratedFile.objects.exists())
+
+
+class RegistryTests(GeneratorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        self.upload = store_upload(SimpleUploadedFile('zzzz.xlsx', build_template()), 'zzzz')
+
+    def test_versions_and_default(self):
+        first = register_template(self.upload, 'FO57', make_default=True)
+        second = register_template(self.upload, 'FO57')
+        self.assertEqual((first.version, second.version), (1, 2))
+        self.assertEqual(resolve_template(name='FO57'), second)
+        self.assertEqual(resolve_template(template_id=first.pk), first)
+        self.assertEqual(resolve_template(), first)
+
+        other = register_template(self.upload, 'AUTRE', make_default=True)
+        self.assertEqual(resolve_template(), other)
+        self.assertFalse(RegisteredTemplate.objects.get(pk=first.pk).is_default)
+
+    def test_version_taken_concurrently_is_retried(self):
+        register_template(self.upload, 'FO57')
+        # Première lecture périmée (version 1 déjà prise par une autre requête)
+        with mock.patch('django.db.models.query.QuerySet.aggregate', side_effect=[{'v': None}, {'v': 1}]):
+            template = register_template(self.upload, 'FO57')
+        self.assertEqual(template.version, 2)
+
+    def test_upload_without_template_uses_default(self):
+        response = self.post_upload(build_pl())
+        self.assertTrue(any(message.startswith("Aucun template") for message in self.messages(response)))
+
+        register_template(self.upload, 'FO57', make_default=True)
+        response = self.post_upload(build_pl())
+        self.assertEqual(response.context['total_containers'], 3)
+
+
+class UploadDedupTests(GeneratorTestCase):
+
+    def test_same_content_is_stored_once(self):
+        template = build_template()
+        self.post_upload(build_pl(), template)
+        with mock.patch('generator.utils.excel_processor.ExcelProcessor.compile_template') as compile_template:
+            self.post_upload(build_pl(), template)
+        # Carte de positions reprise de l'upload précédent du même contenu
+        compile_template.assert_not_called()
+
+        self.assertEqual(UploadBlob.objects.count(), 2)
+        self.assertEqual(UploadedFile.objects.count(), 4)
+        names = set(UploadedFile.objects.filter(file_type='Préparation_PL').values_list('file', flat=True))
+        self.assertEqual(len(names), 1)
+
+    def test_blob_is_deleted_with_its_last_upload(self):
+        content = build_pl()
+        first = store_upload(SimpleUploadedFile('a.xlsx', content), 'Préparation_PL')
+        second = store_upload(SimpleUploadedFile('b.xlsx', content), 'Préparation_PL')
+        blob = first.blob
+        self.assertEqual(second.blob, blob)
+
+        discard_upload(first)
+        self.assertTrue(UploadBlob.objects.filter(pk=blob.pk).exists())
+        self.assertTrue(blob.file.storage.exists(blob.file.name))
+
+        discard_upload(second)
+        self.assertFalse(UploadBlob.objects.filter(pk=blob.pk).exists())
+        self.assertFalse(blob.file.storage.exists(blob.file.name))
+
+
+class ApiIdempotencyTests(GeneratorTestCase):
+
+    def setUp(self):
+        super().setUp()
+        upload = store_upload(SimpleUploadedFile('zzzz.xlsx', build_template()), 'zzzz')
+        register_template(upload, 'FO57', make_default=True)
+        self.rows = [{"CONTENEUR": f"C{i % 2}", "NO_BOBINE": f"B{i}", "REF_PAPIER": "K",
+                      "DIAMETRE": 1000, "POIDS": 500 + i} for i in range(6)]
+
+    def post_batch(self, key, dossiers):
+        return self.client.post(reverse('api_batches'), json.dumps({'idempotency_key': key, 'dossiers': dossiers}),
+                                content_type='application/json')
+
+    def test_same_key_replays_first_response(self):
+        dossiers = [{"numero_dossier": "D1", "rows": self.rows}]
+        first = self.post_batch('k1', dossiers)
+        self.assertEqual(first.status_code, 201)
+        converted = len(FakePDFConverter.converted)
+
+        replay = self.post_batch('k1', dossiers)
+        self.assertEqual(replay.status_code, 200)
+        self.assertEqual(replay.json(), first.json())
+        self.assertEqual(len(FakePDFConverter.converted), converted)
+
+    def test_same_key_other_payload_is_refused(self):
+        self.post_batch('k1', [{"numero_dossier": "D1", "rows": self.rows}])
+        response = self.post_batch('k1', [{"numero_dossier": "D1", "rows": self.rows[:3]}])
+        self.assertEqual(response.status_code, 409)
+
+    def test_unfinished_batch_is_resumed_once_stale(self):
+        dossiers = [{"numero_dossier": "D1", "rows": self.rows}]
+        payload_sha256 = hashlib.sha256(json.dumps(dossiers, sort_keys=True, default=str).encode()).hexdigest()
+        # Lot resté sans réponse (worker tué en cours de traitement)
+        ApiBatch.objects.create(idempotency_key='k1', payload_sha256=payload_sha256)
+        self.assertEqual(self.post_batch('k1', dossiers).status_code, 409)
+
+        ApiBatch.objects.filter(idempotency_key='k1').update(started_at=timezone.now() - timedelta(hours=1))
+        response = self.post_batch('k1', dossiers)
+        self.assertEqual(response.status_code, 201)
+        self.assertIsNotNone(ApiBatch.objects.get(idempotency_key='k1').response)
+
+    def test_invalid_dossier_is_reported_without_failing_the_batch(self):
+        response = self.post_batch('k1', [
+            {"numero_dossier": "OK", "rows": self.rows},
+            {"numero_dossier": "LIGNES", "rows": [1, 2]},
+            {"numero_dossier": "TEMPLATE", "rows": self.rows, "template_id": "abc"},
+        ])
+        self.assertEqual(response.status_code, 201)
+        dossiers = {dossier['numero_dossier']: dossier for dossier in response.json()['dossiers']}
+        self.assertIsNotNone(dossiers['OK']['zip'])
+        self.assertIn('error', dossiers['LIGNES'])
+        self.assertIn('error', dossiers['TEMPLATE'])
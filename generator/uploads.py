@@ -0,0 +1,140 @@
+import os
+import hashlib
+import logging
+
+from django.conf import settings
+from django.core.files.uploadhandler import MemoryFileUploadHandler, StopUpload, TemporaryFileUploadHandler
+from django.db import IntegrityError, transaction
+
+from .models import UploadBlob, UploadedFile
+
+logger = logging.getLogger(__name__)
+
+
+def _max_request_size(max_file_size):
+    """Corps maximal d'un upload : deux fichiers (PL + template) et les champs du formulaire"""
+    return 2 * max_file_size + getattr(settings, 'DATA_UPLOAD_MAX_MEMORY_SIZE', 0)
+
+
+class _HashingMixin:
+    """
+    Calcule le SHA-256 pendant la réception du fichier (aucune relecture) ;
+    le résultat est exposé sur le fichier reçu, attribut `sha256`.
+
+    Applique aussi MAX_UPLOAD_FILE_SIZE pendant la réception : un fichier
+    trop gros interrompt l'upload (StopUpload) avant d'être écrit en entier,
+    et `request.upload_rejected` porte son nom pour le message d'erreur.
+    """
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        self._content_length = content_length
+        return super().handle_raw_input(input_data, META, content_length, boundary, encoding)
+
+    def _reject(self, file_name):
+        if self.request is not None:
+            self.request.upload_rejected = file_name
+        logger.warning(f"Upload {file_name} refusé : dépasse MAX_UPLOAD_FILE_SIZE")
+        raise StopUpload(connection_reset=True)
+
+    def new_file(self, field_name, file_name, *args, **kwargs):
+        # Avant super() : le handler mémoire lève StopFutureHandlers
+        self._sha256 = hashlib.sha256()
+        self._max_size = getattr(settings, 'MAX_UPLOAD_FILE_SIZE', None)
+        content_length = getattr(self, '_content_length', None)
+        if self._max_size and content_length and content_length > _max_request_size(self._max_size):
+            # Corps annoncé trop gros : refus avant d'en lire les fichiers
+            self._reject(file_name)
+        super().new_file(field_name, file_name, *args, **kwargs)
+
+    def receive_data_chunk(self, raw_data, start):
+        if self._max_size and start + len(raw_data) > self._max_size:
+            self._reject(self.file_name)
+        remaining = super().receive_data_chunk(raw_data, start)
+        # None = morceau conservé par ce handler (sinon transmis au suivant)
+        if remaining is None:
+            self._sha256.update(raw_data)
+        return remaining
+
+    def file_complete(self, file_size):
+        uploaded = super().file_complete(file_size)
+        if uploaded is not None:
+            uploaded.sha256 = self._sha256.hexdigest()
+        return uploaded
+
+
+class HashingMemoryFileUploadHandler(_HashingMixin, MemoryFileUploadHandler):
+    pass
+
+
+class HashingTemporaryFileUploadHandler(_HashingMixin, TemporaryFileUploadHandler):
+    pass
+
+
+def _upload_sha256(uploaded):
+    """Empreinte calculée à la réception, sinon par lecture des morceaux"""
+    sha256 = getattr(uploaded, 'sha256', None)
+    if sha256:
+        return sha256
+    h = hashlib.sha256()
+    for chunk in uploaded.chunks():
+        h.update(chunk)
+    return h.hexdigest()
+
+
+def _blob_for(uploaded):
+    """Retourne le blob du contenu, en n'écrivant le fichier que s'il est nouveau"""
+    sha256 = _upload_sha256(uploaded)
+    blob = UploadBlob.objects.filter(sha256=sha256).first()
+    if blob is not None and blob.file.storage.exists(blob.file.name):
+        logger.info(f"Upload {uploaded.name} déjà stocké ({sha256[:12]}), aucune écriture")
+        return blob
+
+    extension = os.path.splitext(uploaded.name)[1].lower()
+    uploaded.seek(0)
+    if blob is not None:
+        # Ligne présente mais fichier disparu : on le réécrit
+        blob.file.save(f"{sha256[:2]}/{sha256}{extension}", uploaded, save=True)
+        return blob
+
+    blob = UploadBlob(sha256=sha256, size=uploaded.size)
+    blob.file.save(f"{sha256[:2]}/{sha256}{extension}", uploaded, save=False)
+    try:
+        with transaction.atomic():
+            blob.save()
+    except IntegrityError:
+        # Même contenu stocké en parallèle par une autre requête
+        blob.file.delete(save=False)
+        return UploadBlob.objects.get(sha256=sha256)
+    logger.info(f"Upload {uploaded.name} stocké ({sha256[:12]}, {uploaded.size} octets)")
+    return blob
+
+
+def store_upload(uploaded, file_type):
+    """
+    Enregistre un fichier uploadé : le contenu est dédupliqué par SHA-256
+    (UploadBlob), chaque soumission garde sa ligne UploadedFile. Pour un
+    template déjà compilé, la carte de positions est reprise telle quelle.
+    """
+    blob = _blob_for(uploaded)
+    previous = (UploadedFile.objects.filter(blob=blob, position_map__isnull=False)
+                .order_by('-uploaded_at').first())
+    return UploadedFile.objects.create(
+        file=blob.file.name,
+        file_type=file_type,
+        original_name=uploaded.name,
+        blob=blob,
+        position_map=previous.position_map if previous else None,
+    )
+
+
+def discard_upload(upload):
+    """Supprime un upload ; le blob n'est effacé que s'il n'est plus référencé"""
+    blob = upload.blob
+    if blob is None:
+        upload.file.delete(save=False)
+        upload.delete()
+        return
+    upload.delete()
+    if not blob.uploads.exists():
+        blob.file.delete(save=False)
+        blob.delete()
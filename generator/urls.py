@@ -1,8 +1,12 @@
 
 from django.urls import path
-from . import views
+from . import api, views
 
 urlpatterns = [
     path('', views.home, name='home'),
-    path('download/', views.download_file, name='download_file'),
+    path('artifacts/<int:pk>/', views.download_artifact, name='download_artifact'),
+    path('artifacts/<int:pk>/preview.png', views.artifact_preview, name='artifact_preview'),
+    path('api/batches/', api.api_batches, name='api_batches'),
+    path('healthz', views.healthz, name='healthz'),
+    path('readyz', views.readyz, name='readyz'),
 ]
\ No newline at end of file
@@ -3,23 +3,132 @@ import pandas as pd
 import os
 from datetime import datetime
 import openpyxl
-from openpyxl.styles import Font, Alignment
-import shutil
+from openpyxl.styles import Font, Alignment, Border, Side
 import logging
+import hashlib
+import json
+import codecs
 from copy import copy
+from functools import lru_cache
+from importlib.util import find_spec
+from io import BytesIO
+
+from .workspace import atomic_path
 
 logger = logging.getLogger(__name__)
 
+# À incrémenter quand le rendu change, pour invalider les empreintes existantes
+FINGERPRINT_VERSION = 1
+
+_HAS_PYARROW = find_spec('pyarrow') is not None
+
+
+BARCODE_FONT_NAME = 'IDAutomationHC39M Free Version'
+BARCODE_ALIGNMENT = Alignment(horizontal='center', vertical='center')
+
+
+@lru_cache(maxsize=None)
+def _barcode_font(size):
+    """Police code-barres, une instance par taille"""
+    return Font(name=BARCODE_FONT_NAME, size=size, bold=False)
+
+
+# Récapitulatif du dossier : nom de fichier et colonnes (titre, clé des agrégats)
+SUMMARY_NAME = 'RECAPITULATIF'
+SUMMARY_COLUMNS = [
+    ("Conteneur", 'container'),
+    ("Bobines", 'bobines'),
+    ("Poids total (kg)", 'poids_total'),
+    ("Poids min", 'poids_min'),
+    ("Poids max", 'poids_max'),
+    ("Diamètre moyen", 'diametre_moyen'),
+    ("Diamètre min", 'diametre_min'),
+    ("Diamètre max", 'diametre_max'),
+    ("Références papier", 'references'),
+]
+SUMMARY_BOLD = Font(bold=True)
+SUMMARY_BORDER = Border(*(Side(style='thin'),) * 4)
+
+
+def _native(value):
+    """Valeur numpy/pandas -> type Python natif (None pour NaN), arrondie"""
+    if pd.isna(value):
+        return None
+    value = value.item() if hasattr(value, 'item') else value
+    return round(value, 2) if isinstance(value, float) else value
+
+
+class TemplateValidationError(ValueError):
+    """Template FO57 ambigu ou incomplet, rejeté avant toute génération"""
+
+
 class ExcelProcessor:
     def __init__(self):
         self.container_column = None
         self.template_path = None
-
-    def set_template(self, template_path):
+        self.template_positions = None
+        self.template_content = None
+
+    def set_template(self, template_path, positions=None, content=None):
+        """
+        Définit le template ; `positions` = carte compilée par compile_template(),
+        `content` = octets du template déjà en mémoire (évite la relecture disque)
+        """
         self.template_path = template_path
+        self.template_positions = positions
+        self.template_content = content
+
+    def read_input_file(self, file_path):
+        """Lit le Preparation PL quel que soit son format (xlsx/xls, CSV, Parquet)"""
+        input_format = self.detect_input_format(file_path)
+        logger.info(f"Lecture PL {os.path.basename(file_path)} (format {input_format})")
+        if input_format == 'parquet':
+            return self.normalize_dataframe(pd.read_parquet(file_path))
+        if input_format == 'csv':
+            return self.normalize_dataframe(self._read_csv(file_path))
+        return self.read_excel_file(file_path)
+
+    def detect_input_format(self, file_path):
+        """Détecte le format par signature du fichier, puis par extension"""
+        with open(file_path, 'rb') as f:
+            head = f.read(8)
+        if head.startswith(b'PAR1'):
+            return 'parquet'
+        if head.startswith(b'PK\x03\x04') or head.startswith(b'\xd0\xcf\x11\xe0'):
+            return 'excel'
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension in ('.xlsx', '.xlsm', '.xls'):
+            return 'excel'
+        if extension in ('.parquet', '.pq'):
+            return 'parquet'
+        return 'csv'
+
+    def _read_csv(self, file_path):
+        """Lit un CSV avec le moteur pyarrow (ou le moteur C), séparateur et encodage détectés"""
+        with open(file_path, 'rb') as f:
+            sample = f.read(64 * 1024)
+        try:
+            # final=False : tolère un caractère multi-octets coupé en fin d'échantillon
+            text = codecs.getincrementaldecoder('utf-8-sig')().decode(sample, final=False)
+            encoding = 'utf-8-sig'
+        except UnicodeDecodeError:
+            text = sample.decode('latin-1')
+            encoding = 'latin-1'
+        first_line = text.splitlines()[0] if text else ''
+        sep = max([';', ',', '\t'], key=first_line.count)
+
+        if sep == ';':
+            # Export « à la française » : virgule décimale, non gérée par pyarrow
+            return pd.read_csv(file_path, sep=sep, decimal=',', encoding=encoding, engine='c')
+        engine = 'pyarrow' if _HAS_PYARROW else 'c'
+        return pd.read_csv(file_path, sep=sep, encoding=encoding, engine=engine)
 
     def read_excel_file(self, file_path):
         df = pd.read_excel(file_path, sheet_name=0)
+        return self.normalize_dataframe(df)
+
+    def normalize_dataframe(self, df):
+        """Normalise un PL déjà chargé (Excel, JSON, ...) : alias de colonnes, doublons, colonne conteneur"""
         df.columns = df.columns.astype(str)
         df.columns = self._clean_column_names(df.columns)
         df = self._remove_duplicate_columns(df)
@@ -86,6 +195,123 @@ class ExcelProcessor:
             return df
         return df[df[self.container_column] == container]
 
+    def container_fingerprint(self, data, header_fields, template_sha256):
+        """Empreinte d'un conteneur : ses lignes + champs d'en-tête + hash du template"""
+        h = hashlib.sha256()
+        h.update(f"v{FINGERPRINT_VERSION}:{template_sha256}".encode())
+        h.update(json.dumps(header_fields, sort_keys=True, default=str).encode())
+        h.update("|".join(map(str, data.columns)).encode())
+        h.update(pd.util.hash_pandas_object(data, index=False).values.tobytes())
+        return h.hexdigest()
+
+    def summary_fingerprint(self, container_fingerprints):
+        """Empreinte du récapitulatif : celles des conteneurs, dans l'ordre"""
+        h = hashlib.sha256()
+        h.update(f"v{FINGERPRINT_VERSION}:{SUMMARY_NAME}".encode())
+        h.update(json.dumps(container_fingerprints).encode())
+        return h.hexdigest()
+
+    def summarize_containers(self, df):
+        """
+        Agrégats par conteneur calculés en un seul groupby sur le PL chargé :
+        nombre de bobines, POIDS (total/min/max), DIAMETRE (moyen/min/max),
+        références papier distinctes. Types Python natifs (sérialisables JSON).
+        """
+        if self.container_column not in df.columns:
+            return {'containers': [], 'totals': {}}
+
+        keys = df[self.container_column]
+        mask = keys.notna()
+        # Mêmes libellés de conteneur que extract_containers()
+        frame = pd.DataFrame({'container': keys[mask].astype(str).str.strip()})
+        for column in ('POIDS', 'DIAMETRE'):
+            if column in df.columns:
+                frame[column] = pd.to_numeric(df.loc[mask, column], errors='coerce')
+
+        grouped = frame.groupby('container', sort=False)
+        stats = grouped.size().to_frame('bobines')
+        if 'POIDS' in frame:
+            stats = stats.join(grouped['POIDS'].agg(['sum', 'min', 'max']).add_prefix('poids_'))
+        if 'DIAMETRE' in frame:
+            stats = stats.join(grouped['DIAMETRE'].agg(['mean', 'min', 'max']).add_prefix('diametre_'))
+        stats = stats.rename(columns={'poids_sum': 'poids_total', 'diametre_mean': 'diametre_moyen'})
+
+        references = {}
+        if 'REF_PAPIER' in df.columns:
+            refs = pd.DataFrame({'container': frame['container'], 'ref': df.loc[mask, 'REF_PAPIER']})
+            refs = refs.dropna().astype(str).drop_duplicates()
+            references = refs.groupby('container', sort=False)['ref'].agg(sorted).to_dict()
+
+        containers = []
+        # to_dict par colonne : garde les entiers entiers (iterrows convertirait en float)
+        for container, row in stats.to_dict('index').items():
+            entry = {'container': container}
+            entry.update((key, _native(value)) for key, value in row.items())
+            entry['references'] = references.get(container, [])
+            containers.append(entry)
+
+        totals = {'conteneurs': len(containers), 'bobines': int(stats['bobines'].sum())}
+        if 'POIDS' in frame:
+            totals.update(poids_total=_native(frame['POIDS'].sum()),
+                          poids_min=_native(frame['POIDS'].min()),
+                          poids_max=_native(frame['POIDS'].max()))
+        if 'DIAMETRE' in frame:
+            totals.update(diametre_moyen=_native(frame['DIAMETRE'].mean()),
+                          diametre_min=_native(frame['DIAMETRE'].min()),
+                          diametre_max=_native(frame['DIAMETRE'].max()))
+        totals['references'] = sorted({ref for refs in references.values() for ref in refs})
+        return {'containers': containers, 'totals': totals}
+
+    def create_summary_excel(self, summary, output_dir, header_fields):
+        """Feuille récapitulative du dossier (une ligne par conteneur + total)"""
+        os.makedirs(output_dir, exist_ok=True)
+        file_path = os.path.join(output_dir, f"{SUMMARY_NAME}.xlsx")
+
+        workbook = openpyxl.Workbook()
+        sheet = workbook.active
+        sheet.title = "Récapitulatif"
+        sheet.page_setup.orientation = 'landscape'
+        sheet.page_setup.fitToWidth = 1
+        sheet.page_setup.fitToHeight = 0
+        sheet.sheet_properties.pageSetUpPr.fitToPage = True
+
+        sheet["A1"] = f"RÉCAPITULATIF DOSSIER {header_fields.get('numero_dossier', '')}".strip()
+        sheet["A1"].font = Font(bold=True, size=14)
+        infos = [
+            ("Fournisseur", header_fields.get('fournisseur', '')),
+            ("Cariste", header_fields.get('cariste', '')),
+            ("Date", header_fields.get('date', datetime.now().strftime('%d/%m/%Y'))),
+            ("Certification", f"{header_fields.get('type_certification', '')} {header_fields.get('numero_certificat', '')}".strip()),
+        ]
+        for offset, (label, value) in enumerate(infos, 3):
+            sheet.cell(row=offset, column=1, value=f"{label} :").font = SUMMARY_BOLD
+            sheet.cell(row=offset, column=2, value=value)
+
+        header_row = 3 + len(infos) + 1
+        for col, (title, _) in enumerate(SUMMARY_COLUMNS, 1):
+            cell = sheet.cell(row=header_row, column=col, value=title)
+            cell.font = SUMMARY_BOLD
+            cell.border = SUMMARY_BORDER
+            cell.alignment = BARCODE_ALIGNMENT
+            sheet.column_dimensions[openpyxl.utils.get_column_letter(col)].width = 14 if col > 1 else 18
+
+        rows = summary['containers'] + [dict(summary['totals'], container='TOTAL')]
+        for offset, entry in enumerate(rows, header_row + 1):
+            for col, (_, key) in enumerate(SUMMARY_COLUMNS, 1):
+                value = entry.get(key)
+                if key == 'references':
+                    value = ", ".join(value or [])
+                cell = sheet.cell(row=offset, column=col, value=value)
+                cell.border = SUMMARY_BORDER
+                if entry is rows[-1]:
+                    cell.font = SUMMARY_BOLD
+        sheet.column_dimensions[openpyxl.utils.get_column_letter(len(SUMMARY_COLUMNS))].width = 40
+
+        with atomic_path(file_path) as tmp_path:
+            workbook.save(tmp_path)
+        logger.info(f"Récapitulatif {file_path} créé ({len(summary['containers'])} conteneurs)")
+        return file_path
+
     def _calculate_font_size(self, bobine_number):
         """Calcule la taille de police adaptative selon la longueur du numéro"""
         length = len(str(bobine_number))
@@ -134,18 +360,10 @@ class ExcelProcessor:
             # Calculer la taille de police adaptative basée sur le numéro actuel
             font_size = self._calculate_font_size(bobine_number)
             
-            # Appliquer la police IDAutomationHC39M avec taille adaptative
-            cell.font = Font(
-                name='IDAutomationHC39M Free Version',
-                size=font_size,
-                bold=False
-            )
-            
-            # Centrer le code-barres dans la cellule
-            cell.alignment = Alignment(
-                horizontal='center', 
-                vertical='center'
-            )
+            # Police IDAutomationHC39M avec taille adaptative, centrée
+            # (objets partagés : un seul style par taille dans le classeur)
+            cell.font = _barcode_font(font_size)
+            cell.alignment = BARCODE_ALIGNMENT
             
             # Ajuster la largeur de colonne si nécessaire
             col_letter = openpyxl.utils.get_column_letter(col)
@@ -176,34 +394,32 @@ class ExcelProcessor:
             source_cell = source_sheet.cell(row=source_row, column=col)
             target_cell = target_sheet.cell(row=target_row, column=col)
             
-            # Copie le style
+            # Copie le style : le StyleArray référence les styles déjà enregistrés
+            # dans le classeur (même classeur : aucun nouveau style créé)
             if source_cell.has_style:
-                target_cell.font = copy(source_cell.font)
-                target_cell.border = copy(source_cell.border)
-                target_cell.fill = copy(source_cell.fill)
-                target_cell.number_format = source_cell.number_format
-                target_cell.protection = copy(source_cell.protection)
-                target_cell.alignment = copy(source_cell.alignment)
+                target_cell._style = copy(source_cell._style)
             
-            # Copie la largeur de colonne
-            col_letter = openpyxl.utils.get_column_letter(col)
-            if col_letter in source_sheet.column_dimensions:
-                target_sheet.column_dimensions[col_letter].width = source_sheet.column_dimensions[col_letter].width
+            # Copie la largeur de colonne (sans objet si même feuille)
+            if source_sheet is not target_sheet:
+                col_letter = openpyxl.utils.get_column_letter(col)
+                if col_letter in source_sheet.column_dimensions:
+                    target_sheet.column_dimensions[col_letter].width = source_sheet.column_dimensions[col_letter].width
 
     def _add_extra_rows(self, sheet, start_row, num_extra_rows, template_row):
         """Ajoute des lignes supplémentaires en copiant le format du template"""
         # HAUTEUR AUGMENTÉE : 45 pixels comme le template zzzz
         template_height = 45.0
         
-        # Insère les nouvelles lignes
-        for i in range(num_extra_rows):
-            sheet.insert_rows(start_row)
-            
+        # Insère toutes les nouvelles lignes en une fois (un seul décalage des
+        # cellules situées en dessous, au lieu d'un par ligne)
+        sheet.insert_rows(start_row, amount=num_extra_rows)
+        
+        for target_row in range(start_row, start_row + num_extra_rows):
             # Appliquer la hauteur augmentée
-            sheet.row_dimensions[start_row].height = template_height
+            sheet.row_dimensions[target_row].height = template_height
             
             # Copie le format de la ligne template vers la nouvelle ligne
-            self._copy_row_formatting(sheet, sheet, template_row, start_row)
+            self._copy_row_formatting(sheet, sheet, template_row, target_row)
         
         return start_row
 
@@ -223,25 +439,27 @@ class ExcelProcessor:
             filename = f"{container}.xlsx"
             file_path = os.path.join(output_dir, filename)
 
-            # Copie du template de base
-            if not os.path.exists(self.template_path):
-                raise FileNotFoundError(f"Template introuvable : {self.template_path}")
-            shutil.copy2(self.template_path, file_path)
-
-            workbook = openpyxl.load_workbook(file_path)
+            # Chargement du template de base
+            if self.template_content is not None:
+                workbook = openpyxl.load_workbook(BytesIO(self.template_content))
+            else:
+                if not self.template_path or not os.path.exists(self.template_path):
+                    raise FileNotFoundError(f"Template introuvable : {self.template_path}")
+                workbook = openpyxl.load_workbook(self.template_path)
             sheet = workbook["FO57"] if "FO57" in workbook.sheetnames else workbook.active
-            base_positions = self._find_field_positions(sheet)
 
-            # Détection automatique du nombre de lignes de données dans le modèle
-            start_row = base_positions.get("start_row", 15)
-            
-            # Trouver la dernière ligne de données dans le template
-            last_data_row = start_row
-            while sheet.cell(row=last_data_row, column=1).value not in (None, "", " "):
-                last_data_row += 1
-            
-            template_data_rows = last_data_row - start_row
-            logger.info(f"Template a {template_data_rows} lignes de données (de {start_row} à {last_data_row-1})")
+            if self.template_positions:
+                # Carte compilée à l'upload : aucun balayage du template
+                base_positions = dict(self.template_positions)
+                start_row = base_positions["start_row"]
+                template_data_rows = base_positions["template_data_rows"]
+            else:
+                base_positions = self._find_field_positions(sheet)
+
+                # Détection automatique du nombre de lignes de données dans le modèle
+                start_row = base_positions.get("start_row", 15)
+                template_data_rows = self._count_template_data_rows(sheet, start_row)
+            logger.info(f"Template a {template_data_rows} lignes de données (à partir de la ligne {start_row})")
 
             total_bobines = len(data)
             
@@ -251,7 +469,7 @@ class ExcelProcessor:
                 logger.info(f"Ajout de {extra_rows_needed} lignes supplémentaires dans la même feuille")
                 
                 # Utilise la dernière ligne de données comme template pour les nouvelles lignes
-                template_format_row = start_row + template_data_rows - 1
+                template_format_row = base_positions.get("prototype_row", start_row + template_data_rows - 1)
                 self._add_extra_rows(sheet, start_row + template_data_rows, extra_rows_needed, template_format_row)
 
             #  APPLIQUER LA HAUTEUR AUGMENTÉE à toutes les lignes
@@ -271,7 +489,9 @@ class ExcelProcessor:
             for sheet_name in sheets_to_remove:
                 del workbook[sheet_name]
 
-            workbook.save(file_path)
+            # Écriture dans un fichier temporaire puis renommage atomique
+            with atomic_path(file_path) as tmp_path:
+                workbook.save(tmp_path)
             logger.info(f"Fichier {file_path} créé avec {total_bobines} bobines, hauteur augmentée (45px)")
             return file_path
 
@@ -296,7 +516,11 @@ class ExcelProcessor:
         code_barre_col = positions.get('col_code_barre', 4)  # Colonne D par défaut
         bobine_col = positions.get('col_bobine', 2)  # Colonne B par défaut
 
-        for idx, (_, row) in enumerate(data.iterrows(), 1):
+        # Valeurs identiques sur toutes les lignes : calculées une seule fois
+        numero_certificat = str(numero_certificat)
+
+        # Dictionnaires natifs : bien plus rapides à parcourir que iterrows()
+        for idx, row in enumerate(data.to_dict('records'), 1):
             excel_row = start_row + idx - 1
             bobine_number = row.get('NO_BOBINE', '')
 
@@ -313,7 +537,7 @@ class ExcelProcessor:
             if 'col_poids' in positions:
                 sheet.cell(row=excel_row, column=positions['col_poids'], value=row.get('POIDS', ''))
             if 'col_certificat' in positions:
-                sheet.cell(row=excel_row, column=positions['col_certificat'], value=str(numero_certificat))
+                sheet.cell(row=excel_row, column=positions['col_certificat'], value=numero_certificat)
             if 'col_type_certif' in positions:
                 sheet.cell(row=excel_row, column=positions['col_type_certif'], value=type_certification)
 
@@ -327,42 +551,113 @@ class ExcelProcessor:
                 # Si pas de numéro de bobine, laisser une formule vide
                 sheet.cell(row=excel_row, column=code_barre_col).value = ""
 
-    def _find_field_positions(self, sheet):
-        """Détecte la position des champs dans le template FO57"""
-        pos = {}
+    def _count_template_data_rows(self, sheet, start_row):
+        """Compte les lignes de données déjà présentes dans le template"""
+        last_data_row = start_row
+        while sheet.cell(row=last_data_row, column=1).value not in (None, "", " "):
+            last_data_row += 1
+        return last_data_row - start_row
+
+    def _collect_field_candidates(self, sheet):
+        """Relève toutes les cellules candidates pour chaque champ du template FO57"""
+        candidates = {}
+
+        def add(key, cell):
+            candidates.setdefault(key, []).append(cell)
+
         for row in sheet.iter_rows(max_row=20):
             for cell in row:
                 if cell.value:
                     val = str(cell.value).upper().strip()
                     if "CARISTE" in val:
-                        pos["cariste"] = cell.coordinate
+                        add("cariste", cell)
                     if "N° CT" in val or "CONTENEUR" in val:
-                        pos["container"] = cell.coordinate
+                        add("container", cell)
                     if "DATE" in val:
-                        pos["date"] = cell.coordinate
+                        add("date", cell)
                     if "DOSSIER" in val:
-                        pos["dossier"] = cell.coordinate
+                        add("dossier", cell)
 
         for r in range(1, 40):
             for c in range(1, 40):
-                v = str(sheet.cell(row=r, column=c).value or "").upper().strip()
+                cell = sheet.cell(row=r, column=c)
+                v = str(cell.value or "").upper().strip()
                 if v in ["N°", "NO", "NUMERO"]:
-                    pos["col_numero"] = c
-                    pos["start_row"] = r + 1
+                    add("col_numero", cell)
                 elif "N° FOURNISSEUR" in v or "NO FOURNISSEUR" in v:
-                    pos["col_bobine"] = c
+                    add("col_bobine", cell)
                 elif v == "FOURNISSEUR":
-                    pos["col_fournisseur"] = c
+                    add("col_fournisseur", cell)
                 elif "REF" in v or "RÉFÉRENCE" in v:
-                    pos["col_reference"] = c
+                    add("col_reference", cell)
                 elif "DIAM" in v:
-                    pos["col_diametre"] = c
+                    add("col_diametre", cell)
                 elif "POIDS" in v:
-                    pos["col_poids"] = c
+                    add("col_poids", cell)
                 elif v in ["N° CERTIFICAT FSC", "CERTIFICAT FSC"]:
-                    pos["col_certificat"] = c
+                    add("col_certificat", cell)
                 elif "TYPE" in v or "CERTIFICATION" in v:
-                    pos["col_type_certif"] = c
+                    add("col_type_certif", cell)
                 elif "CODE BARRE" in v:
-                    pos["col_code_barre"] = c
-        return pos
\ No newline at end of file
+                    add("col_code_barre", cell)
+        return candidates
+
+    def _find_field_positions(self, sheet):
+        """Détecte la position des champs dans le template FO57"""
+        pos = {}
+        for key, cells in self._collect_field_candidates(sheet).items():
+            # Comme historiquement : la dernière cellule trouvée l'emporte
+            cell = cells[-1]
+            if key.startswith("col_"):
+                pos[key] = cell.column
+            else:
+                pos[key] = cell.coordinate
+            if key == "col_numero":
+                pos["start_row"] = cell.row + 1
+        return pos
+
+    def compile_template(self, template_path):
+        """
+        Valide le template et compile sa carte de positions une fois pour toutes.
+
+        Lève TemplateValidationError si un champ est détecté dans plusieurs
+        cellules/colonnes différentes, ou si la colonne N° est introuvable.
+        La carte retournée est sérialisable en JSON (stockée avec l'upload).
+        """
+        workbook = openpyxl.load_workbook(template_path)
+        try:
+            sheet = workbook["FO57"] if "FO57" in workbook.sheetnames else workbook.active
+            candidates = self._collect_field_candidates(sheet)
+
+            errors = []
+            pos = {"sheet": sheet.title}
+            for key, cells in candidates.items():
+                if key == "col_numero":
+                    values = {(cell.row, cell.column) for cell in cells}
+                elif key.startswith("col_"):
+                    values = {cell.column for cell in cells}
+                else:
+                    values = {cell.coordinate for cell in cells}
+                if len(values) > 1:
+                    coords = ", ".join(cell.coordinate for cell in cells)
+                    errors.append(f"champ '{key}' ambigu ({coords})")
+                    continue
+                cell = cells[0]
+                pos[key] = cell.column if key.startswith("col_") else cell.coordinate
+
+            if "col_numero" not in candidates:
+                errors.append("colonne N° introuvable (ligne de départ des données inconnue)")
+            if errors:
+                raise TemplateValidationError("; ".join(errors))
+
+            pos["start_row"] = candidates["col_numero"][0].row + 1
+            pos["template_data_rows"] = self._count_template_data_rows(sheet, pos["start_row"])
+            pos["prototype_row"] = pos["start_row"] + pos["template_data_rows"] - 1
+
+            missing = [k for k in ("cariste", "container", "date", "dossier") if k not in pos]
+            if missing:
+                logger.warning(f"Template {template_path} : en-têtes absents {missing}")
+            logger.info(f"Template compilé : {pos}")
+            return pos
+        finally:
+            workbook.close()
@@ -1,20 +1,471 @@
-
 import os
+import sys
+import atexit
+import itertools
+import queue
+import shutil
+import signal
+import tempfile
+import threading
 import subprocess
+import time
 import logging
+from concurrent.futures import Future, TimeoutError as FutureTimeoutError
+from importlib import import_module
 from pathlib import Path
-import pythoncom
-import win32com.client
+
+from .workspace import atomic_path
 
 logger = logging.getLogger(__name__)
 
+# Conversions avant recyclage préventif d'une instance Excel (fuites mémoire COM)
+MAX_CONVERSIONS_PER_INSTANCE = 200
+# Intervalle de vérification d'une conversion encore en file (secondes)
+QUEUE_POLL_INTERVAL = 1
+
+
+class PDFConverter:
+    """
+    Interface d'un convertisseur Excel → PDF.
+
+    Toute implémentation (pool win32com, faux convertisseur pour les tests
+    sous Linux, ...) fournit convert() et éventuellement shutdown().
+    """
+
+    def convert(self, excel_path, pdf_path):
+        """Convertit excel_path en pdf_path ; retourne pdf_path ou None"""
+        raise NotImplementedError
+
+    def convert_many(self, jobs):
+        """Convertit une liste de (excel_path, pdf_path) ; retourne les pdf_path (ou None)"""
+        return [self.convert(excel_path, pdf_path) for excel_path, pdf_path in jobs]
+
+    def shutdown(self):
+        """Libère les ressources du convertisseur"""
+
+
+class _ExcelComWorker(threading.Thread):
+    """Thread propriétaire d'une instance Excel longue durée (COM initialisé sur ce thread)"""
+
+    def __init__(self, jobs, index):
+        super().__init__(name=f"excel-com-{index}", daemon=True)
+        self.jobs = jobs
+        self.excel_app = None
+        self.excel_pid = None
+        self.conversions = 0
+        # Conversion en cours (et son début), et abandon décidé par le pool (délai dépassé)
+        self.current = None
+        self.started_at = None
+        self.abandoned = False
+
+    def run(self):
+        # Import paresseux : pywin32 n'existe que sous Windows
+        import pythoncom
+        pythoncom.CoInitialize()
+        try:
+            while not self.abandoned:
+                job = self.jobs.get()
+                if job is None:
+                    break
+                excel_path, pdf_path, future = job
+                # Conversion annulée pendant qu'elle attendait dans la file
+                if not future.set_running_or_notify_cancel():
+                    continue
+                self.started_at = time.monotonic()
+                self.current = future
+                try:
+                    future.set_result(self._convert(excel_path, pdf_path))
+                except Exception as e:
+                    future.set_exception(e)
+                finally:
+                    self.current = None
+        finally:
+            self._quit()
+            pythoncom.CoUninitialize()
+
+    def _ensure_app(self):
+        """Démarre Excel si besoin, ou le recycle s'il ne répond plus"""
+        if self.excel_app is not None:
+            try:
+                self.excel_app.Workbooks.Count
+            except Exception:
+                logger.warning(f"{self.name} : instance Excel plantée, recyclage")
+                self._quit()
+        if self.excel_app is None:
+            import win32com.client
+            self.excel_app = win32com.client.DispatchEx("Excel.Application")
+            self.excel_app.Visible = False
+            self.excel_app.DisplayAlerts = False
+            self.conversions = 0
+            try:
+                import win32process
+                _, self.excel_pid = win32process.GetWindowThreadProcessId(self.excel_app.Hwnd)
+            except Exception:
+                self.excel_pid = None
+            logger.info(f"{self.name} : instance Excel démarrée")
+        return self.excel_app
+
+    def _quit(self):
+        try:
+            if self.excel_app is not None:
+                self.excel_app.Quit()
+        except Exception:
+            pass
+        self.excel_app = None
+        self.excel_pid = None
+
+    def abandon(self):
+        """
+        Appelé par le pool quand la conversion en cours dépasse le délai :
+        tue le processus Excel (débloque l'appel COM) ; le thread se termine
+        ensuite sans publier de PDF ni prendre d'autre conversion.
+        """
+        self.abandoned = True
+        pid = self.excel_pid
+        if pid:
+            try:
+                # Sous Windows, os.kill appelle TerminateProcess
+                os.kill(pid, signal.SIGTERM)
+                logger.warning(f"{self.name} : processus Excel {pid} tué (conversion bloquée)")
+            except OSError as e:
+                logger.error(f"{self.name} : impossible de tuer Excel {pid} : {e}")
+
+    def _convert(self, excel_path, pdf_path):
+        workbook = None
+        try:
+            excel_app = self._ensure_app()
+            workbook = excel_app.Workbooks.Open(os.path.abspath(excel_path))
+
+            # Export en PDF (fichier temporaire puis renommage atomique)
+            with atomic_path(pdf_path) as tmp_path:
+                workbook.ExportAsFixedFormat(0, os.path.abspath(tmp_path))  # 0 = xlTypePDF
+                if self.abandoned:
+                    # Délai dépassé : le job est peut-être déjà publié, on n'y écrit plus
+                    raise RuntimeError("conversion abandonnée après expiration du délai")
+        except Exception as e:
+            logger.error(f"Erreur lors de la conversion Excel: {e}")
+            # Instance dans un état inconnu : on repart d'une instance neuve
+            self._quit()
+            return None
+        finally:
+            try:
+                if workbook:
+                    workbook.Close(SaveChanges=False)
+            except Exception:
+                pass
+
+        self.conversions += 1
+        if self.conversions >= MAX_CONVERSIONS_PER_INSTANCE:
+            logger.info(f"{self.name} : recyclage préventif après {self.conversions} conversions")
+            self._quit()
+
+        if os.path.exists(pdf_path):
+            logger.info(f" PDF créé avec succès : {pdf_path}")
+            return pdf_path
+        logger.warning(f" PDF non généré : {pdf_path}")
+        return None
+
+
+class ExcelComPool(PDFConverter):
+    """Pool d'instances Excel chaudes ; les conversions sont mises en file d'attente"""
+
+    def __init__(self, size=2, timeout=300):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.jobs = queue.Queue()
+        self.workers = []
+        self._worker_ids = itertools.count()
+        self._lock = threading.Lock()
+
+    def _start(self):
+        with self._lock:
+            # Redémarre les threads morts ou abandonnés (conversion bloquée)
+            self.workers = [w for w in self.workers if w.is_alive() and not w.abandoned]
+            while len(self.workers) < self.size:
+                worker = _ExcelComWorker(self.jobs, next(self._worker_ids))
+                worker.start()
+                self.workers.append(worker)
+
+    def submit(self, excel_path, pdf_path):
+        """Met une conversion en file ; retourne un Future"""
+        self._start()
+        future = Future()
+        self.jobs.put((excel_path, pdf_path, future))
+        return future
+
+    def _expire(self, excel_path, future):
+        """
+        Conversion hors délai : annulée si elle attend encore dans la file,
+        sinon son instance Excel est tuée et remplacée par un nouveau thread.
+        """
+        logger.error(f"Conversion PDF expirée après {self.timeout}s : {excel_path}")
+        if future.cancel():
+            return
+        with self._lock:
+            worker = next((w for w in self.workers if w.current is future), None)
+            if worker is not None:
+                self.workers.remove(worker)
+        if worker is not None:
+            worker.abandon()
+            self._start()
+
+    def convert(self, excel_path, pdf_path):
+        return self.convert_many([(excel_path, pdf_path)])[0]
+
+    def _running_since(self, future):
+        """Début (monotonic) de la conversion si une instance l'a prise en charge, sinon None"""
+        with self._lock:
+            worker = next((w for w in self.workers if w.current is future), None)
+            return worker.started_at if worker is not None else None
+
+    def _wait(self, excel_path, future):
+        """
+        Attend le résultat d'une conversion. Le délai ne court qu'à partir de sa
+        prise en charge par une instance : le temps passé dans la file, derrière
+        les lots des autres requêtes du processus, n'est pas compté.
+        """
+        while True:
+            started = self._running_since(future)
+            if started is None:
+                wait = QUEUE_POLL_INTERVAL
+            else:
+                wait = max(0, self.timeout - (time.monotonic() - started))
+            try:
+                return future.result(timeout=wait)
+            except FutureTimeoutError:
+                started = self._running_since(future)
+                if started is not None and time.monotonic() - started >= self.timeout:
+                    self._expire(excel_path, future)
+                    return None
+
+    def convert_many(self, jobs):
+        # Toutes les conversions partent dans la file : les instances travaillent en parallèle
+        futures = [self.submit(excel_path, pdf_path) for excel_path, pdf_path in jobs]
+        return [self._wait(excel_path, future) for (excel_path, _), future in zip(jobs, futures)]
+
+    def queue_depth(self):
+        return self.jobs.qsize()
+
+    def shutdown(self):
+        with self._lock:
+            for _ in self.workers:
+                self.jobs.put(None)
+            for worker in self.workers:
+                worker.join(timeout=10)
+            self.workers = []
+
+
+def libreoffice_binary(binary=None):
+    """Chemin de soffice (LIBREOFFICE_BINARY, sinon PATH) ou None s'il est introuvable"""
+    if binary:
+        return shutil.which(binary) or (binary if os.path.isfile(binary) else None)
+    return shutil.which('soffice') or shutil.which('libreoffice')
+
+
+class LibreOfficeConverter(PDFConverter):
+    """
+    Conversion via LibreOffice headless.
+
+    Si les bindings UNO sont disponibles, un listener soffice persistant est
+    réutilisé d'une conversion à l'autre ; sinon tout un lot est converti en
+    une seule invocation `soffice --headless --convert-to pdf`.
+    """
+
+    def __init__(self, binary=None, timeout=300, use_listener=True):
+        self.binary = libreoffice_binary(binary)
+        if self.binary is None:
+            logger.error("LibreOffice introuvable (soffice) : aucun PDF ne pourra être généré")
+            self.binary = binary or 'soffice'
+        self.timeout = timeout
+        self.use_listener = use_listener
+        # Profil dédié au processus : deux soffice ne peuvent pas partager un profil
+        self.profile_dir = tempfile.mkdtemp(prefix=f"lo_profile_{os.getpid()}_")
+        self.pipe_name = f"packing_list_{os.getpid()}"
+        self.listener = None
+        self.desktop = None
+        self._lock = threading.Lock()
+
+    def convert(self, excel_path, pdf_path):
+        return self.convert_many([(excel_path, pdf_path)])[0]
+
+    def convert_many(self, jobs):
+        if not jobs:
+            return []
+        with self._lock:
+            if self.use_listener and self._connect():
+                try:
+                    return [self._convert_uno(excel_path, pdf_path) for excel_path, pdf_path in jobs]
+                except Exception as e:
+                    logger.warning(f"Listener LibreOffice indisponible ({e}), bascule en mode batch")
+                    self._stop_listener()
+            return self._convert_batch(jobs)
+
+    def _base_command(self):
+        profile_url = Path(self.profile_dir).as_uri()
+        return [self.binary, f"-env:UserInstallation={profile_url}", '--headless', '--invisible',
+                '--nologo', '--norestore', '--nodefault']
+
+    def _convert_batch(self, jobs):
+        """Un seul lancement de soffice pour tout le lot"""
+        out_dir = tempfile.mkdtemp(prefix='.lo_out_', dir=os.path.dirname(os.path.abspath(jobs[0][1])))
+        try:
+            command = self._base_command() + ['--convert-to', 'pdf', '--outdir', out_dir]
+            command += [os.path.abspath(excel_path) for excel_path, _ in jobs]
+            logger.info(f"LibreOffice : conversion de {len(jobs)} fichiers en une invocation")
+            completed = subprocess.run(command, capture_output=True, text=True, timeout=self.timeout)
+            if completed.returncode != 0:
+                logger.error(f"soffice a échoué ({completed.returncode}) : {completed.stderr.strip()}")
+
+            results = []
+            for excel_path, pdf_path in jobs:
+                produced = os.path.join(out_dir, f"{Path(excel_path).stem}.pdf")
+                if os.path.exists(produced):
+                    os.replace(produced, pdf_path)
+                    logger.info(f" PDF créé avec succès : {pdf_path}")
+                    results.append(pdf_path)
+                else:
+                    logger.warning(f" PDF non généré : {pdf_path}")
+                    results.append(None)
+            return results
+        except (OSError, subprocess.TimeoutExpired) as e:
+            logger.error(f"Erreur LibreOffice : {e}")
+            return [None] * len(jobs)
+        finally:
+            shutil.rmtree(out_dir, ignore_errors=True)
+
+    def _connect(self):
+        """Démarre (si besoin) le listener soffice et s'y connecte via UNO"""
+        if self.desktop is not None and self.listener and self.listener.poll() is None:
+            return True
+        try:
+            import uno
+        except ImportError:
+            self.use_listener = False
+            return False
+
+        self._stop_listener()
+        try:
+            self.listener = subprocess.Popen(
+                self._base_command() + [f"--accept=pipe,name={self.pipe_name};urp;"],
+                stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+            )
+        except OSError as e:
+            logger.warning(f"Impossible de lancer le listener LibreOffice : {e}")
+            self.use_listener = False
+            return False
+
+        local_context = uno.getComponentContext()
+        resolver = local_context.ServiceManager.createInstanceWithContext(
+            'com.sun.star.bridge.UnoUrlResolver', local_context)
+        deadline = time.time() + 30
+        while time.time() < deadline:
+            try:
+                context = resolver.resolve(f"uno:pipe,name={self.pipe_name};urp;StarOffice.ComponentContext")
+                self.desktop = context.ServiceManager.createInstanceWithContext(
+                    'com.sun.star.frame.Desktop', context)
+                logger.info("Listener LibreOffice prêt")
+                return True
+            except Exception:
+                time.sleep(0.5)
+        logger.warning("Listener LibreOffice injoignable, mode batch")
+        self._stop_listener()
+        return False
+
+    def _convert_uno(self, excel_path, pdf_path):
+        import uno
+        from com.sun.star.beans import PropertyValue
+
+        def prop(name, value):
+            p = PropertyValue()
+            p.Name = name
+            p.Value = value
+            return p
+
+        document = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(os.path.abspath(excel_path)), '_blank', 0, (prop('Hidden', True),))
+        try:
+            with atomic_path(pdf_path) as tmp_path:
+                document.storeToURL(uno.systemPathToFileUrl(os.path.abspath(tmp_path)),
+                                    (prop('FilterName', 'calc_pdf_Export'),))
+        finally:
+            document.close(True)
+        logger.info(f" PDF créé avec succès : {pdf_path}")
+        return pdf_path
+
+    def _stop_listener(self):
+        self.desktop = None
+        if self.listener and self.listener.poll() is None:
+            self.listener.terminate()
+            try:
+                self.listener.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.listener.kill()
+        self.listener = None
+
+    def shutdown(self):
+        with self._lock:
+            self._stop_listener()
+        shutil.rmtree(self.profile_dir, ignore_errors=True)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+_converter = None
+
+
+def get_excel_pool():
+    """Pool win32com partagé par le processus (taille : settings.PDF_EXCEL_POOL_SIZE)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            from django.conf import settings
+            _pool = ExcelComPool(
+                size=getattr(settings, 'PDF_EXCEL_POOL_SIZE', 2),
+                timeout=getattr(settings, 'PDF_CONVERSION_TIMEOUT', 300),
+            )
+            atexit.register(_pool.shutdown)
+        return _pool
+
+
+def converter_queue_depth():
+    """Conversions en attente dans le pool win32com de ce processus (sans le créer)"""
+    return _pool.queue_depth() if _pool is not None else 0
+
+
+def get_converter():
+    """
+    Convertisseur choisi par settings.PDF_CONVERTER : 'win32com', 'libreoffice'
+    ou chemin pointé vers une classe PDFConverter. Par défaut win32com sous
+    Windows, LibreOffice ailleurs.
+    """
+    global _converter
+    from django.conf import settings
+    name = getattr(settings, 'PDF_CONVERTER', None) or ('win32com' if sys.platform == 'win32' else 'libreoffice')
+    if name == 'win32com':
+        return get_excel_pool()
+    with _pool_lock:
+        if _converter is None:
+            timeout = getattr(settings, 'PDF_CONVERSION_TIMEOUT', 300)
+            if name == 'libreoffice':
+                _converter = LibreOfficeConverter(
+                    binary=getattr(settings, 'LIBREOFFICE_BINARY', None),
+                    timeout=timeout,
+                )
+            else:
+                module_path, class_name = name.rsplit('.', 1)
+                _converter = getattr(import_module(module_path), class_name)()
+            atexit.register(_converter.shutdown)
+        return _converter
+
+
 class PDFGenerator:
-    def __init__(self):
-        logger.info("PDFGenerator initialisé (Excel → PDF avec win32com)")
+    def __init__(self, converter=None):
+        self.converter = converter or get_converter()
+        logger.info(f"PDFGenerator initialisé (Excel → PDF avec {type(self.converter).__name__})")
 
     def convert_excel_to_pdf(self, excel_path, output_dir, container_name=None):
         """
-        Convertit Excel en PDF avec win32com (Windows seulement)
+        Convertit Excel en PDF via le convertisseur configuré
         """
         try:
             if not excel_path or not os.path.exists(excel_path):
@@ -29,75 +480,32 @@ class PDFGenerator:
             pdf_path = os.path.join(output_dir, pdf_filename)
 
             logger.info(f"Conversion Excel → PDF : {excel_path} → {pdf_path}")
+            return self.converter.convert(excel_path, pdf_path)
 
-            #Initialisation COM
-            
-            pythoncom.CoInitialize()
-
-            # Utilisation de win32com
-            
-            
-            excel_app = None
-            workbook = None
-            
-            try:
-                excel_app = win32com.client.Dispatch("Excel.Application")
-                excel_app.Visible = False
-                excel_app.DisplayAlerts = False
-
-                workbook = excel_app.Workbooks.Open(os.path.abspath(excel_path))
-                
-                # Export en PDF
-                workbook.ExportAsFixedFormat(0, os.path.abspath(pdf_path))  # 0 = xlTypePDF
-                
-                workbook.Close(SaveChanges=False)
-                
-                if os.path.exists(pdf_path):
-                    logger.info(f" PDF créé avec succès : {pdf_path}")
-                    return pdf_path
-                else:
-                    logger.warning(f" PDF non généré : {pdf_path}")
-                    return None
-                    
-            except Exception as e:
-                logger.error(f"Erreur lors de la conversion Excel: {e}")
-                return None
-            finally:
-                # Fermeture propre dans le bon ordre
-                try:
-                    if workbook:
-                        workbook.Close(SaveChanges=False)
-                except:
-                    pass
-                
-                try:
-                    if excel_app:
-                        excel_app.Quit()
-                except:
-                    pass
-                
-                # Libération des objets COM
-                try:
-                    if workbook:
-                        del workbook
-                    if excel_app:
-                        del excel_app
-                except:
-                    pass
-                
-                #  Désinitialisation COM
-                pythoncom.CoUninitialize()
-
-        except ImportError:
-            logger.error("win32com non disponible - PDF non généré")
-            return None
         except Exception as e:
             logger.error(f"Erreur lors de la conversion Excel → PDF : {e}")
             return None
 
+    def convert_many(self, excel_paths, output_dir):
+        """
+        Convertit plusieurs Excel en un lot (une invocation LibreOffice, ou
+        conversions parallèles dans le pool win32com).
+        Retourne {excel_path: pdf_path ou None}.
+        """
+        os.makedirs(output_dir, exist_ok=True)
+        jobs = [(excel_path, os.path.join(output_dir, f"{Path(excel_path).stem}.pdf"))
+                for excel_path in excel_paths if excel_path and os.path.exists(excel_path)]
+        try:
+            pdf_paths = self.converter.convert_many(jobs)
+        except Exception as e:
+            logger.error(f"Erreur lors de la conversion Excel → PDF : {e}")
+            pdf_paths = [None] * len(jobs)
+        converted = {excel_path: pdf_path for (excel_path, _), pdf_path in zip(jobs, pdf_paths)}
+        return {excel_path: converted.get(excel_path) for excel_path in excel_paths}
+
 def create_pdf_from_excel(excel_path, output_dir, container_name=None):
     """
     Fonction simplifiée pour conversion directe.
     """
     generator = PDFGenerator()
-    return generator.convert_excel_to_pdf(excel_path, output_dir, container_name)
\ No newline at end of file
+    return generator.convert_excel_to_pdf(excel_path, output_dir, container_name)
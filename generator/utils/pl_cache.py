@@ -0,0 +1,124 @@
+import os
+import json
+import time
+import logging
+from importlib.util import find_spec
+
+from .workspace import atomic_path
+
+logger = logging.getLogger(__name__)
+
+# À incrémenter quand la normalisation du PL change (alias, doublons, ...)
+PL_CACHE_VERSION = 1
+
+_HAS_PYARROW = find_spec('pyarrow') is not None
+
+
+class ParsedPLCache:
+    """
+    Cache disque des PL déjà lus et normalisés, indexé par le SHA-256 de
+    l'upload : DataFrame au format Feather (Arrow) + fichier JSON décrivant
+    la colonne conteneur, écrit en dernier. Éviction LRU (date de dernier
+    accès = mtime) au-delà de `max_size` octets. Sans pyarrow, inactif.
+    """
+
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self.enabled = _HAS_PYARROW and max_size > 0
+
+    def _paths(self, sha256):
+        stem = os.path.join(self.directory, f"v{PL_CACHE_VERSION}-{sha256}")
+        return f"{stem}.feather", f"{stem}.json"
+
+    def get(self, sha256):
+        """Retourne (DataFrame, colonne conteneur) ou None si absent"""
+        if not self.enabled:
+            return None
+        data_path, meta_path = self._paths(sha256)
+        try:
+            with open(meta_path, encoding='utf-8') as f:
+                meta = json.load(f)
+            import pandas as pd
+            df = pd.read_feather(data_path)
+        except (OSError, ValueError) as e:
+            if not isinstance(e, FileNotFoundError):
+                logger.warning(f"Cache PL illisible pour {sha256[:12]} : {e}")
+            return None
+        # Accès = rafraîchissement pour l'éviction LRU
+        now = time.time()
+        for path in (data_path, meta_path):
+            try:
+                os.utime(path, (now, now))
+            except OSError:
+                pass
+        logger.info(f"PL {sha256[:12]} lu depuis le cache ({len(df)} lignes)")
+        return df, meta['container_column']
+
+    def put(self, sha256, df, container_column):
+        """
+        Stocke un PL normalisé et retourne le DataFrame relu depuis le cache
+        (types identiques aux lectures suivantes), ou None si non mis en cache.
+        """
+        if not self.enabled:
+            return None
+        os.makedirs(self.directory, exist_ok=True)
+        data_path, meta_path = self._paths(sha256)
+        try:
+            with atomic_path(data_path) as tmp_path:
+                df.reset_index(drop=True).to_feather(tmp_path)
+            with atomic_path(meta_path) as tmp_path:
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump({
+                        'container_column': container_column,
+                        'rows': len(df),
+                        'pl_cache_version': PL_CACHE_VERSION,
+                    }, f)
+            import pandas as pd
+            cached = pd.read_feather(data_path)
+        except Exception as e:
+            # Colonnes de types mixtes, disque plein... : on continue sans cache
+            logger.warning(f"PL {sha256[:12]} non mis en cache : {e}")
+            for path in (data_path, meta_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            return None
+        logger.info(f"PL {sha256[:12]} mis en cache ({len(cached)} lignes)")
+        try:
+            self.evict()
+        except Exception as e:
+            # L'entrée est écrite : un échec d'éviction ne doit pas faire échouer la génération
+            logger.warning(f"Cache PL : éviction impossible : {e}")
+        return cached
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_size"""
+        entries = {}
+        for entry in os.scandir(self.directory):
+            # Entrée supprimée ou remplacée entre le listage et le stat par un autre worker
+            try:
+                if entry.name.startswith('.') or not entry.is_file():
+                    continue
+                stat = entry.stat()
+            except OSError:
+                continue
+            stem = os.path.splitext(entry.name)[0]
+            size, mtime = entries.get(stem, (0, 0))
+            entries[stem] = (size + stat.st_size, max(mtime, stat.st_mtime))
+
+        total = sum(size for size, _ in entries.values())
+        for stem, (size, _) in sorted(entries.items(), key=lambda item: item[1][1]):
+            if total <= self.max_size:
+                break
+            # Le JSON d'abord : une entrée sans JSON n'est plus jamais lue
+            for extension in ('.json', '.feather'):
+                try:
+                    os.remove(os.path.join(self.directory, stem + extension))
+                except FileNotFoundError:
+                    pass
+                except OSError as e:
+                    logger.warning(f"Cache PL : {stem + extension} non supprimé : {e}")
+            total -= size
+            logger.info(f"Cache PL : entrée {stem} évincée")
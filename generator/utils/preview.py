@@ -0,0 +1,98 @@
+import os
+import shutil
+import logging
+import subprocess
+import tempfile
+from importlib.util import find_spec
+from io import BytesIO
+
+logger = logging.getLogger(__name__)
+
+# Largeur des vignettes en pixels
+PREVIEW_WIDTH = 480
+# Lignes non vides reprises dans un aperçu rendu depuis l'Excel
+PREVIEW_MAX_ROWS = 30
+
+_HAS_PYMUPDF = find_spec('pymupdf') is not None or find_spec('fitz') is not None
+_HAS_PIL = find_spec('PIL') is not None
+
+
+def pdf_first_page_png(pdf_path, width=PREVIEW_WIDTH):
+    """Première page d'un PDF en PNG (PyMuPDF, sinon pdftoppm) ; None si impossible"""
+    if _HAS_PYMUPDF:
+        try:
+            try:
+                import pymupdf
+            except ImportError:
+                import fitz as pymupdf
+            with pymupdf.open(pdf_path) as document:
+                page = document[0]
+                zoom = width / page.rect.width
+                return page.get_pixmap(matrix=pymupdf.Matrix(zoom, zoom)).tobytes('png')
+        except Exception as e:
+            logger.warning(f"Aperçu PyMuPDF impossible pour {os.path.basename(pdf_path)}: {e}")
+
+    binary = shutil.which('pdftoppm')
+    if binary:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            prefix = os.path.join(tmp_dir, 'preview')
+            try:
+                subprocess.run(
+                    [binary, '-png', '-f', '1', '-l', '1', '-singlefile',
+                     '-scale-to-x', str(width), '-scale-to-y', '-1', pdf_path, prefix],
+                    check=True, capture_output=True, timeout=60,
+                )
+                with open(f"{prefix}.png", 'rb') as f:
+                    return f.read()
+            except (subprocess.SubprocessError, OSError) as e:
+                logger.warning(f"Aperçu pdftoppm impossible pour {os.path.basename(pdf_path)}: {e}")
+    return None
+
+
+def excel_png(xlsx_path, width=PREVIEW_WIDTH, max_rows=PREVIEW_MAX_ROWS):
+    """
+    Aperçu dessiné directement depuis les données de l'Excel (Pillow) :
+    premières lignes non vides de la feuille, sans passer par le PDF.
+    """
+    if not _HAS_PIL:
+        return None
+    import openpyxl
+    from PIL import Image, ImageDraw, ImageFont
+
+    workbook = openpyxl.load_workbook(xlsx_path, read_only=True)
+    try:
+        sheet = workbook["FO57"] if "FO57" in workbook.sheetnames else workbook.active
+        rows = []
+        for values in sheet.iter_rows(values_only=True):
+            if any(value not in (None, '') for value in values):
+                rows.append(values)
+            if len(rows) >= max_rows:
+                break
+    finally:
+        workbook.close()
+    if not rows:
+        return None
+
+    columns = max(len(row) for row in rows)
+    column_width = width / columns
+    row_height = 16
+    image = Image.new('RGB', (width, row_height * len(rows) + 1), 'white')
+    draw = ImageDraw.Draw(image)
+    font = ImageFont.load_default()
+    for r, row in enumerate(rows):
+        top = r * row_height
+        for c in range(columns):
+            left = int(c * column_width)
+            draw.rectangle([left, top, int(left + column_width), top + row_height], outline=(200, 200, 200))
+            value = row[c] if c < len(row) else None
+            if value is None:
+                continue
+            # Formule code-barres (=B15) : symbole à la place du texte de la formule
+            text = '|||' if str(value).startswith('=') else str(value)
+            while text and draw.textlength(text, font=font) > column_width - 4:
+                text = text[:-1]
+            draw.text((left + 2, top + 2), text, fill='black', font=font)
+
+    buffer = BytesIO()
+    image.save(buffer, format='PNG', optimize=True)
+    return buffer.getvalue()
@@ -0,0 +1,144 @@
+import io
+import time
+import marshal
+import pstats
+import cProfile
+import logging
+import threading
+import tracemalloc
+from importlib.util import find_spec
+
+logger = logging.getLogger(__name__)
+
+_HAS_PYINSTRUMENT = find_spec('pyinstrument') is not None
+
+# Nombre de lignes gardées dans le rapport (fonctions / sites d'allocation)
+TOP_FUNCTIONS = 40
+TOP_ALLOCATIONS = 20
+
+# tracemalloc est global au processus : le premier profil actif le démarre,
+# le dernier l'arrête (sauf s'il était déjà actif avant eux)
+_tracemalloc_lock = threading.Lock()
+_tracemalloc_users = 0
+_tracemalloc_owned = False
+
+
+def _acquire_tracemalloc():
+    """Enregistre un profil actif ; retourne vrai s'il est seul (pic remis à zéro)"""
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        if _tracemalloc_users == 0:
+            _tracemalloc_owned = not tracemalloc.is_tracing()
+            if _tracemalloc_owned:
+                tracemalloc.start(10)
+            tracemalloc.reset_peak()
+        _tracemalloc_users += 1
+        return _tracemalloc_users == 1
+
+
+def _release_tracemalloc():
+    global _tracemalloc_users, _tracemalloc_owned
+    with _tracemalloc_lock:
+        _tracemalloc_users -= 1
+        if _tracemalloc_users == 0 and _tracemalloc_owned:
+            tracemalloc.stop()
+            _tracemalloc_owned = False
+
+
+class GenerationProfiler:
+    """
+    Profil optionnel d'une génération : temps (pyinstrument si installé,
+    sinon cProfile) et mémoire (pic et principaux sites d'allocation
+    tracemalloc). Ne fait rien si `enabled` est faux.
+
+    tracemalloc est global au processus : avec plusieurs requêtes
+    simultanées, le pic mémoire inclut celles des autres threads et n'est
+    remis à zéro que par un profil démarré seul (signalé dans le rapport).
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.profiler = None
+        self.duration = 0.0
+        self.peak_memory = 0
+        self.report = ''
+        self.raw = None
+        self.raw_extension = None
+        self._tracing = False
+        self._exclusive = False
+
+    def __enter__(self):
+        if not self.enabled:
+            return self
+        self._exclusive = _acquire_tracemalloc()
+        self._tracing = True
+        if _HAS_PYINSTRUMENT:
+            from pyinstrument import Profiler
+            self.profiler = Profiler()
+        else:
+            self.profiler = cProfile.Profile()
+        self._start = time.perf_counter()
+        if isinstance(self.profiler, cProfile.Profile):
+            self.profiler.enable()
+        else:
+            self.profiler.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        """Ne lève jamais : une erreur du profilage est reportée dans le rapport"""
+        if not self.enabled:
+            return False
+        errors = []
+        try:
+            if isinstance(self.profiler, cProfile.Profile):
+                self.profiler.disable()
+            else:
+                self.profiler.stop()
+        except Exception as e:
+            errors.append(f"Arrêt du profil CPU impossible : {e}")
+        self.duration = time.perf_counter() - self._start
+
+        allocations = []
+        try:
+            _, self.peak_memory = tracemalloc.get_traced_memory()
+            allocations = tracemalloc.take_snapshot().statistics('lineno')[:TOP_ALLOCATIONS]
+        except Exception as e:
+            errors.append(f"Instantané tracemalloc impossible : {e}")
+        finally:
+            if self._tracing:
+                self._tracing = False
+                _release_tracemalloc()
+
+        try:
+            cpu_report = self._cpu_report()
+        except Exception as e:
+            cpu_report = ''
+            errors.append(f"Rapport CPU impossible : {e}")
+
+        peak_note = '' if self._exclusive else ' (inclut les générations simultanées)'
+        self.report = '\n'.join([
+            f"Durée : {self.duration:.2f}s",
+            f"Pic mémoire (tracemalloc) : {self.peak_memory / 1024 / 1024:.1f} Mo{peak_note}",
+            *(f"Erreur : {error}" for error in errors),
+            '',
+            f"=== {TOP_ALLOCATIONS} principaux sites d'allocation ===",
+            *(str(stat) for stat in allocations),
+            '',
+            '=== Profil CPU ===',
+            cpu_report,
+        ])
+        for error in errors:
+            logger.warning(f"Profil génération : {error}")
+        logger.info(f"Profil génération : {self.duration:.2f}s, pic {self.peak_memory / 1024 / 1024:.1f} Mo")
+        return False
+
+    def _cpu_report(self):
+        if isinstance(self.profiler, cProfile.Profile):
+            stream = io.StringIO()
+            stats = pstats.Stats(self.profiler, stream=stream)
+            stats.sort_stats('cumulative').print_stats(TOP_FUNCTIONS)
+            # Même contenu que pstats.dump_stats(), lisible par snakeviz / pstats
+            self.raw, self.raw_extension = marshal.dumps(stats.stats), 'prof'
+            return stream.getvalue()
+        self.raw, self.raw_extension = self.profiler.output_html().encode(), 'html'
+        return self.profiler.output_text(unicode=True)
@@ -0,0 +1,89 @@
+import os
+import json
+import shutil
+import uuid
+import hashlib
+import logging
+import tempfile
+from contextlib import contextmanager
+from datetime import datetime
+
+logger = logging.getLogger(__name__)
+
+# Marqueur de publication : écrit en dernier, liste les fichiers complets du job
+MANIFEST_NAME = 'MANIFEST.json'
+
+
+def _sha256(file_path):
+    h = hashlib.sha256()
+    with open(file_path, 'rb') as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+@contextmanager
+def atomic_path(target_path):
+    """
+    Fournit un chemin temporaire dans le même dossier que `target_path` ;
+    renommé atomiquement sur la cible si le bloc réussit, supprimé sinon.
+    """
+    directory, filename = os.path.split(target_path)
+    stem, extension = os.path.splitext(filename)
+    # L'extension est conservée : certains outils (Excel, soffice) s'y fient
+    tmp_path = os.path.join(directory, f".{stem}.{uuid.uuid4().hex[:8]}.tmp{extension}")
+    try:
+        yield tmp_path
+        os.replace(tmp_path, target_path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+class JobWorkspace:
+    """Dossier de travail unique par génération, publié par un manifeste"""
+
+    def __init__(self, base_dir):
+        os.makedirs(base_dir, exist_ok=True)
+        timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
+        # mkdtemp garantit l'unicité même pour deux jobs lancés à la même seconde
+        self.path = tempfile.mkdtemp(prefix=f"session_{timestamp}_", dir=base_dir)
+        os.chmod(self.path, 0o755)
+        self.job_id = os.path.basename(self.path)[len('session_'):]
+        self.published = False
+
+    def file_path(self, filename):
+        return os.path.join(self.path, filename)
+
+    def artifacts(self):
+        """Fichiers finaux du job (hors temporaires et manifeste)"""
+        return sorted(
+            name for name in os.listdir(self.path)
+            if not name.startswith('.') and name != MANIFEST_NAME
+        )
+
+    def publish(self, extra=None):
+        """Écrit le manifeste : à partir de là, les fichiers listés sont téléchargeables"""
+        manifest = {
+            'job_id': self.job_id,
+            'published_at': datetime.now().isoformat(timespec='seconds'),
+            'files': {
+                name: {
+                    'size': os.path.getsize(self.file_path(name)),
+                    'sha256': _sha256(self.file_path(name)),
+                }
+                for name in self.artifacts()
+            },
+        }
+        if extra:
+            manifest.update(extra)
+        with atomic_path(self.file_path(MANIFEST_NAME)) as tmp_path:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, ensure_ascii=False, indent=2)
+        self.published = True
+        logger.info(f"Job {self.job_id} publié ({len(manifest['files'])} fichiers)")
+        return manifest
+
+    def discard(self):
+        """Supprime l'espace d'un job abandonné avant publication"""
+        shutil.rmtree(self.path, ignore_errors=True)
@@ -1,31 +1,39 @@
 import os
-import pandas as pd
 import logging
 import traceback
-from datetime import datetime
-from django.shortcuts import render, redirect
-from django.http import FileResponse, HttpResponse
+from django.shortcuts import get_object_or_404, render
+from django.http import FileResponse, Http404, JsonResponse
+from django.db import connection
 from django.conf import settings
 from django.contrib import messages
-from .models import UploadedFile, GeneratedFile
-from .utils.excel_processor import ExcelProcessor
-from .utils.pdf_generator import PDFGenerator
-import zipfile
+from django.views.decorators.http import condition
+from .models import GeneratedFile
+from .registry import available_templates, load_template, register_template, resolve_template
+from .pipeline import in_flight_generations, load_preparation, run_generation, save_profile
+from .previews import PREVIEW_VERSION, get_preview
+from .storage import local_copy
+from .uploads import discard_upload, store_upload
+from .utils.profiling import GenerationProfiler
 import time
 
 logger = logging.getLogger(__name__)
 
+# Durée de cache navigateur des vignettes (un an : les artefacts sont immuables)
+PREVIEW_MAX_AGE = 365 * 24 * 3600
+
+def _render_upload(request, context=None):
+    """Rend upload.html avec la liste des templates enregistrés"""
+    context = dict(context or {})
+    context['templates'] = available_templates()
+    return render(request, 'upload.html', context)
+
 def home(request):
     """Vue principale — Upload, génération Excel/PDF et affichage des résultats"""
 
-    # 🔹 Téléchargement direct via ?download=...&file_path=...
-    file_type = request.GET.get('download')
-    file_path = request.GET.get('file_path')
-    if file_type and file_path and os.path.exists(file_path):
-        return FileResponse(open(file_path, 'rb'), as_attachment=True)
-
-    
     if request.method == 'POST':
+        # Imports lourds (pandas, openpyxl) chargés seulement quand on génère
+        from .utils.excel_processor import ExcelProcessor, TemplateValidationError
+        from .utils.pdf_generator import PDFGenerator
         
         
         print(" === DÉBUT TRAITEMENT ===")
@@ -35,9 +43,21 @@ def home(request):
         prep_file = request.FILES.get('preparation_pl')
         zzz_file = request.FILES.get('zzz_file')
 
+        max_size = getattr(settings, 'MAX_UPLOAD_FILE_SIZE', None)
+        rejected = getattr(request, 'upload_rejected', None)
+        if rejected:
+            # Upload interrompu pendant la réception (generator.uploads)
+            messages.error(request, f"Fichier trop volumineux (max {max_size // (1024 * 1024)} Mo) : {rejected}")
+            return _render_upload(request)
+
         if not prep_file:
             messages.error(request, "Le fichier Preparation PL est obligatoire.")
-            return render(request, 'upload.html')
+            return _render_upload(request)
+
+        oversized = [f.name for f in (prep_file, zzz_file) if f and max_size and f.size > max_size]
+        if oversized:
+            messages.error(request, f"Fichier trop volumineux (max {max_size // (1024 * 1024)} Mo) : {', '.join(oversized)}")
+            return _render_upload(request)
 
         #  Générer toujours Excel et PDF
         generer_excel = True
@@ -49,6 +69,11 @@ def home(request):
         numero_dossier = request.POST.get('numero_dossier', '').strip()
         type_certification = request.POST.get('type_certification', '').strip()
         numero_certificat = request.POST.get('numero_certificat', '').strip()
+        template_id = request.POST.get('template_id', '').strip()
+        template_name = request.POST.get('template_name', '').strip()
+        template_default = request.POST.get('template_default') == 'on'
+        profile_requested = (request.POST.get('profile') == 'on' or request.GET.get('profile') == '1'
+                             or getattr(settings, 'GENERATION_PROFILING', False))
 
         #  LOG des données du formulaire
         print("📋 DONNÉES FORMULAIRE:")
@@ -65,143 +90,87 @@ def home(request):
         try:
             #  Sauvegarde fichiers
             print("1.  Sauvegarde des fichiers...")
-            prep_obj = UploadedFile.objects.create(
-                file=prep_file,
-                file_type='Préparation_PL',
-                original_name=prep_file.name
-            )
-            zzz_obj = None
-            if zzz_file:
-                zzz_obj = UploadedFile.objects.create(
-                    file=zzz_file,
-                    file_type='zzzz',
-                    original_name=zzz_file.name
-                )
+            # Contenu dédupliqué par SHA-256 : un fichier déjà connu n'est pas réécrit
+            prep_obj = store_upload(prep_file, 'Préparation_PL')
+            zzz_obj = store_upload(zzz_file, 'zzzz') if zzz_file else None
             print("    Fichiers sauvegardés")
 
             processor = ExcelProcessor()
             pdf_generator = PDFGenerator()
 
-            #  Configuration template
+            #  Validation + compilation du template (une seule fois par contenu)
+            if zzz_obj:
+                if not zzz_obj.position_map:
+                    try:
+                        with local_copy(zzz_obj.file) as template_path:
+                            zzz_obj.position_map = processor.compile_template(template_path)
+                    except TemplateValidationError as e:
+                        logger.warning(f"Template rejeté {zzz_obj.original_name}: {e}")
+                        discard_upload(zzz_obj)
+                        messages.error(request, f"Template rejeté : {e}")
+                        return _render_upload(request)
+                    zzz_obj.save(update_fields=['position_map'])
+                if template_name:
+                    register_template(zzz_obj, template_name, make_default=template_default)
+
+            #  Configuration template : upload du jour, sinon template enregistré / par défaut
             print("2. ⚙️ Configuration template...")
-            if zzz_file and zzz_obj:
-                processor.set_template(zzz_obj.file.path)
-                print(f"    Template défini: {zzz_obj.file.path}")
-                logger.info(f"Template zzzz.xlsx défini : {zzz_obj.file.path}")
-            else:
-                print("    Aucun template uploadé")
-                logger.warning("Aucun template zzzz.xlsx uploadé fourni")
-
-            #  Lecture fichier principal
-            print("3.  Lecture fichier Excel...")
-            prep_data, columns = processor.read_excel_file(prep_obj.file.path)
-            print(f"    Fichier lu: {len(prep_data)} lignes, {len(columns)} colonnes")
-            
-            # : Extraction conteneurs
-            print("4.  Extraction conteneurs...")
-            containers = processor.extract_containers(prep_data)
-            print(f"    Conteneurs trouvés: {containers}")
-            
-            if not containers:
-                messages.error(request, "Aucun conteneur trouvé dans le fichier.")
-                return render(request, 'upload.html')
-
-            # Dossier principal 
-            base_output_dir = getattr(settings, 'CUSTOM_DOWNLOAD_DIR',
-                                      os.path.join(settings.MEDIA_ROOT, 'generated'))
-            os.makedirs(base_output_dir, exist_ok=True)
-
-            #  sous-dossier session
-            session_timestamp = datetime.now().strftime('%Y%m%d_%H%M%S')
-            session_dir = os.path.join(base_output_dir, f"session_{session_timestamp}")
-            os.makedirs(session_dir, exist_ok=True)
-            print(f"    Dossier session: {session_dir}")
-
-            results = []
-
-            # Traitement de chaque conteneur
-            print(f"5. Traitement de {len(containers)} conteneurs...")
-            for i, container in enumerate(containers):
-                container_start = time.time()
-                print(f"    Conteneur {i+1}/{len(containers)}: {container}")
-                
-                container_data = processor.filter_by_container(prep_data, container)
-                print(f"       Données: {len(container_data)} bobines")
-
-                excel_path = None
-                pdf_path = None
-
-                #  Génération Excel (TOUJOURS)
-                print(f"       Génération Excel...")
-                excel_path = processor.create_excel(
-                    data=container_data,
-                    container=container,
-                    output_dir=session_dir,
-                    cariste=cariste,
-                    fournisseur=fournisseur,
-                    numero_dossier=numero_dossier,
-                    type_certification=type_certification,
-                    numero_certificat=numero_certificat
-                )
-                if excel_path:
-                    print(f"       Excel généré: {os.path.basename(excel_path)}")
-                else:
-                    print(f"       Erreur génération Excel")
-
-                #  Génération PDF 
-                if excel_path:
-                    print(f"   Génération PDF...")
-                    pdf_path = pdf_generator.convert_excel_to_pdf(
-                        excel_path=excel_path,
-                        output_dir=session_dir,
-                        container_name=container
-                    )
-                    if pdf_path:
-                        print(f"      PDF généré: {os.path.basename(pdf_path)}")
-                    else:
-                        print(f"       Erreur génération PDF")
-
-                #  Enregistrement dans la base
-                if excel_path:
-                    GeneratedFile.objects.create(
-                        file=os.path.relpath(excel_path, settings.MEDIA_ROOT),
-                        file_type='excel',
-                        container_name=container
-                    )
-                if pdf_path:
-                    GeneratedFile.objects.create(
-                        file=os.path.relpath(pdf_path, settings.MEDIA_ROOT),
-                        file_type='pdf',
-                        container_name=container
-                    )
-
-                #  Ajout des résultats
-                results.append({
-                    'container': container,
-                    'excel_path': excel_path,
-                    'pdf_path': pdf_path,
-                    'excel_filename': os.path.basename(excel_path) if excel_path else 'Non généré',
-                    'pdf_filename': os.path.basename(pdf_path) if pdf_path else 'Non généré',
+            template_upload = zzz_obj
+            if template_upload is None:
+                registered = resolve_template(template_id=template_id or None)
+                template_upload = registered.upload if registered else None
+            if template_upload is None:
+                print("    Aucun template disponible")
+                logger.warning("Aucun template zzzz uploadé ni enregistré")
+                messages.error(request, "Aucun template : uploadez un fichier zzzz ou enregistrez un template par défaut.")
+                return _render_upload(request)
+
+            template = load_template(template_upload, processor)
+            processor.set_template(template.name, positions=template.positions, content=template.content)
+            print(f"    Template défini: {template.name}")
+            logger.info(f"Template zzzz.xlsx défini : {template.name}")
+
+            #  Profilage optionnel (case du formulaire, ?profile=1 ou GENERATION_PROFILING)
+            profiler = GenerationProfiler(enabled=profile_requested)
+            with profiler:
+                #  Lecture fichier principal
+                print("3.  Lecture fichier PL...")
+                prep_data, columns = load_preparation(processor, prep_obj)
+                print(f"    Fichier lu: {len(prep_data)} lignes, {len(columns)} colonnes")
+
+                generation = run_generation(processor, pdf_generator, prep_data, template, {
+                    'cariste': cariste,
+                    'fournisseur': fournisseur,
+                    'numero_dossier': numero_dossier,
+                    'type_certification': type_certification,
+                    'numero_certificat': numero_certificat,
                 })
-                
-                container_time = time.time() - container_start
-                print(f"        Temps conteneur: {container_time:.2f}s")
-
-            # ⭐ ÉTAPE 6: Création ZIP
-            print("6.  Création ZIP...")
-            zip_path = create_session_zip(session_dir, session_timestamp)
-            print(f"    ZIP créé: {zip_path}")
+            if generation is not None:
+                save_profile(profiler, generation['job_id'], generation['session_dir'])
+            if generation is None:
+                messages.error(request, "Aucun conteneur trouvé dans le fichier.")
+                return _render_upload(request)
+            containers = generation['containers']
+            results = generation['results']
 
             total_time = time.time() - start_time
             print(f" TRAITEMENT TERMINÉ - Temps total: {total_time:.2f}s")
             logger.info(f" TRAITEMENT TERMINÉ - {len(containers)} conteneurs en {total_time:.2f}s")
 
-            return render(request, 'upload.html', {
+            return _render_upload(request, {
                 'results': results,
                 'show_results': True,
-                'session_dir': session_dir,
-                'zip_path': zip_path,
+                'session_dir': generation['session_dir'],
+                'zip_path': generation['zip_path'],
+                'zip_id': generation['zip_id'],
                 'total_containers': len(containers),
+                'preview_version': PREVIEW_VERSION,
+                'summary_totals': generation['summary']['totals'],
+                'summary_excel_id': generation['summary_result']['excel_id'],
+                'summary_pdf_id': generation['summary_result']['pdf_id'],
+                'summary_manifest_id': generation['summary_result']['manifest_id'],
+                'reused_containers': [r['container'] for r in results if r['reused']],
+                'rebuilt_containers': [r['container'] for r in results if not r['reused']],
                 'cariste_utilise': cariste,
                 'fournisseur_utilise': fournisseur,
                 'numero_dossier_utilise': numero_dossier,
@@ -214,43 +183,70 @@ def home(request):
             print(f" ERREUR après {error_time:.2f}s: {str(e)}")
             logger.error(f"Erreur lors du traitement: {traceback.format_exc()}")
             messages.error(request, f"Erreur: {str(e)}")
-            return render(request, 'upload.html')
+            return _render_upload(request)
+
+    return _render_upload(request)
 
-    return render(request, 'upload.html')
+
+def download_artifact(request, pk):
+    """Télécharge un fichier généré (Excel, PDF, ZIP ou manifeste) par son identifiant."""
+    generated = get_object_or_404(GeneratedFile, pk=pk)
+    try:
+        # Passe par le stockage d'artefacts : servi par n'importe quel nœud
+        handle = generated.file.open('rb')
+    except (FileNotFoundError, OSError) as e:
+        logger.error(f"Erreur téléchargement fichier {generated.file.name}: {e}")
+        raise Http404("Fichier non trouvé")
+    return FileResponse(handle, as_attachment=True, filename=generated.filename())
 
 
-def create_session_zip(session_dir, session_timestamp):
-    """Crée un ZIP contenant tous les fichiers Excel/PDF de la session."""
-    zip_filename = f"fichiers_conteneurs_{session_timestamp}.zip"
-    zip_path = os.path.join(os.path.dirname(session_dir), zip_filename)
+def _preview_etag(request, pk):
+    # Un artefact ne change jamais après publication : l'ETag ne dépend que de son id
+    return f"preview-{pk}-v{PREVIEW_VERSION}"
 
-    print(f"  Création ZIP: {zip_path}")
-    
-    with zipfile.ZipFile(zip_path, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for root, dirs, files in os.walk(session_dir):
-            for file in files:
-                file_path = os.path.join(root, file)
-                arcname = os.path.basename(file_path)
-                zipf.write(file_path, arcname)
-                print(f"  Ajout: {file}")
 
-    print(f"  ZIP créé avec {len(files)} fichiers")
-    return zip_path
+@condition(etag_func=_preview_etag)
+def artifact_preview(request, pk):
+    """Vignette PNG de la première page d'un fichier généré, rendue à la demande."""
+    generated = get_object_or_404(GeneratedFile, pk=pk)
+    try:
+        preview = get_preview(generated)
+    except Exception as e:
+        logger.error(f"Erreur aperçu fichier {generated.file.name}: {e}")
+        preview = None
+    if not preview:
+        raise Http404("Aperçu indisponible")
+    response = FileResponse(preview.open('rb'), content_type='image/png')
+    response['Cache-Control'] = f"public, max-age={PREVIEW_MAX_AGE}, immutable"
+    return response
+
 
+def healthz(request):
+    """Liveness : le processus répond."""
+    return JsonResponse({'status': 'ok'})
 
-def download_file(request):
-    """Télécharge un fichier individuel (Excel ou PDF)."""
-    file_path = request.GET.get('file_path')
 
-    if not file_path or not os.path.exists(file_path):
-        messages.error(request, "Fichier non trouvé")
-        return redirect('home')
+def readyz(request):
+    """Readiness : base joignable et générations en cours du worker sous le seuil."""
+    from .utils.pdf_generator import converter_queue_depth
 
+    checks = {}
     try:
-        response = FileResponse(open(file_path, 'rb'), as_attachment=True)
-        response['Content-Disposition'] = f'attachment; filename="{os.path.basename(file_path)}"'
-        return response
+        connection.ensure_connection()
+        checks['database'] = 'ok'
     except Exception as e:
-        logger.error(f"Erreur téléchargement fichier {file_path}: {e}")
-        messages.error(request, f"Erreur lors du téléchargement: {str(e)}")
-        return redirect('home')
\ No newline at end of file
+        checks['database'] = f"erreur : {e}"
+
+    in_flight = in_flight_generations()
+    max_in_flight = getattr(settings, 'READINESS_MAX_IN_FLIGHT', 0)
+
+    ready = checks['database'] == 'ok' and (not max_in_flight or in_flight < max_in_flight)
+    return JsonResponse({
+        'status': 'ready' if ready else 'unavailable',
+        'checks': checks,
+        'queue': {
+            'generations_in_flight': in_flight,
+            'max_in_flight': max_in_flight,
+            'pdf_conversions_queued': converter_queue_depth(),
+        },
+    }, status=200 if ready else 503)
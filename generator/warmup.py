@@ -0,0 +1,29 @@
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+def preload():
+    """
+    Charge à l'avance les modules lourds de la génération (pandas, openpyxl).
+
+    Destiné au processus maître gunicorn lancé avec --preload : les workers
+    forkés partagent alors ces modules en copy-on-write au lieu de les
+    importer chacun à la première génération. Aucun thread ni processus
+    externe n'est démarré ici (ils ne survivraient pas au fork).
+    """
+    start = time.perf_counter()
+    from io import BytesIO
+
+    import openpyxl
+    import pandas as pd
+
+    from .utils import excel_processor, pdf_generator  # noqa: F401
+
+    # Premier usage : déclenche les imports paresseux internes de pandas/openpyxl
+    buffer = BytesIO()
+    openpyxl.Workbook().save(buffer)
+    buffer.seek(0)
+    pd.read_excel(buffer)
+    logger.info(f"Modules de génération préchargés en {time.perf_counter() - start:.2f}s")
@@ -0,0 +1,99 @@
+"""
+Configuration gunicorn de production, chargée automatiquement depuis la racine
+du projet (ou via `gunicorn -c gunicorn.conf.py packing_list.wsgi:application`).
+
+Le nombre de workers est dérivé des CPU et de la mémoire disponibles au
+démarrage (limites cgroup du conteneur comprises). Chaque valeur peut être
+forcée par variable d'environnement GUNICORN_*.
+"""
+import os
+
+
+def _env_int(name, default):
+    value = os.environ.get(name)
+    return int(value) if value else default
+
+
+def _cpu_count():
+    """CPU réellement utilisables (affinité + quota cgroup v2/v1)"""
+    try:
+        count = len(os.sched_getaffinity(0))
+    except AttributeError:
+        count = os.cpu_count() or 1
+    try:
+        with open('/sys/fs/cgroup/cpu.max') as f:
+            quota, period = f.read().split()
+        if quota != 'max':
+            count = min(count, max(1, int(int(quota) / int(period))))
+    except (OSError, ValueError):
+        try:
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_quota_us') as f:
+                quota = int(f.read())
+            with open('/sys/fs/cgroup/cpu/cpu.cfs_period_us') as f:
+                period = int(f.read())
+            if quota > 0:
+                count = min(count, max(1, quota // period))
+        except (OSError, ValueError):
+            pass
+    return count
+
+
+def _memory_limit_mb():
+    """Mémoire disponible en Mo (limite cgroup si présente, sinon RAM physique)"""
+    for path in ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes'):
+        try:
+            with open(path) as f:
+                value = f.read().strip()
+            if value != 'max' and int(value) < 1 << 60:
+                return int(value) // (1024 * 1024)
+        except (OSError, ValueError):
+            continue
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES') // (1024 * 1024)
+    except (AttributeError, ValueError, OSError):
+        return 2048
+
+
+# Pic mémoire d'une grosse génération (pandas + openpyxl) ; chaque thread
+# d'un worker peut en mener une, le budget d'un worker est donc x threads
+WORKER_MEMORY_MB = _env_int('GUNICORN_WORKER_MEMORY_MB', 400)
+
+bind = f"0.0.0.0:{os.environ.get('PORT', '8000')}"
+
+# gthread : un upload lent n'immobilise qu'un thread, pas tout le worker
+worker_class = 'gthread'
+threads = _env_int('GUNICORN_THREADS', 4)
+workers = _env_int(
+    'GUNICORN_WORKERS',
+    max(1, min(2 * _cpu_count() + 1, _memory_limit_mb() // (WORKER_MEMORY_MB * threads))),
+)
+
+# Les générations volumineuses dépassent largement les 30s par défaut
+timeout = _env_int('GUNICORN_TIMEOUT', 600)
+graceful_timeout = _env_int('GUNICORN_GRACEFUL_TIMEOUT', 120)
+keepalive = 5
+
+# Recyclage des workers pour contenir la croissance mémoire d'openpyxl
+max_requests = _env_int('GUNICORN_MAX_REQUESTS', 200)
+max_requests_jitter = _env_int('GUNICORN_MAX_REQUESTS_JITTER', 50)
+
+# Taille des en-têtes ; la taille des corps est limitée côté Django (settings)
+limit_request_line = 8190
+limit_request_fields = 100
+limit_request_field_size = 8190
+
+# Modules lourds chargés une fois dans le maître, partagés par les workers
+preload_app = os.environ.get('GUNICORN_PRELOAD', '1').lower() in ('1', 'true', 'yes')
+if preload_app:
+    os.environ.setdefault('GENERATOR_PRELOAD', '1')
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('GUNICORN_LOG_LEVEL', 'info')
+
+
+def when_ready(server):
+    server.log.info(
+        f"Profil serveur : {workers} workers x {threads} threads ({worker_class}), "
+        f"timeout {timeout}s, recyclage après {max_requests} requêtes"
+    )
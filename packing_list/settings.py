@@ -93,7 +93,7 @@ else:
     DATABASES = {
         'default': {
             'ENGINE': 'django.db.backends.sqlite3',
-            'NAME': BASE_DIR / 'db.sqlite3',
+            'NAME': config('SQLITE_PATH', default=str(BASE_DIR / 'db.sqlite3')),
         }
     }
 
@@ -125,16 +125,43 @@ STATIC_URL = '/static/'
 STATICFILES_DIRS = [os.path.join(BASE_DIR, 'static')]
 STATIC_ROOT = os.path.join(BASE_DIR, 'staticfiles')
 
-# Configuration WhiteNoise pour les fichiers statiques
-# Dans packing_list/settings.py
-STATICFILES_STORAGE = 'django.contrib.staticfiles.storage.StaticFilesStorage'
-
 # Default primary key field type
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 # Media files
 MEDIA_URL = '/media/'
-MEDIA_ROOT = os.path.join(BASE_DIR, 'media')
+MEDIA_ROOT = config('MEDIA_ROOT', default=os.path.join(BASE_DIR, 'media'))
+
+# Stockage des fichiers générés : 'local' (MEDIA_ROOT) ou 's3' (S3/MinIO partagé
+# entre plusieurs nœuds, nécessite django-storages[s3])
+ARTIFACT_STORAGE = config('ARTIFACT_STORAGE', default='local')
+if ARTIFACT_STORAGE == 's3':
+    ARTIFACT_STORAGE_CONFIG = {
+        'BACKEND': 'storages.backends.s3.S3Storage',
+        'OPTIONS': {
+            'bucket_name': config('AWS_STORAGE_BUCKET_NAME', default='packing-list'),
+            'endpoint_url': config('AWS_S3_ENDPOINT_URL', default='') or None,
+            'access_key': config('AWS_ACCESS_KEY_ID', default=''),
+            'secret_key': config('AWS_SECRET_ACCESS_KEY', default=''),
+            'region_name': config('AWS_S3_REGION_NAME', default='') or None,
+            'addressing_style': 'path',
+            'file_overwrite': False,
+            'default_acl': None,
+            'querystring_auth': True,
+        },
+    }
+else:
+    # Sans OPTIONS : MEDIA_ROOT / MEDIA_URL, relus à chaque changement (tests)
+    ARTIFACT_STORAGE_CONFIG = {
+        'BACKEND': 'django.core.files.storage.FileSystemStorage',
+    }
+
+# Configuration WhiteNoise pour les fichiers statiques
+STORAGES = {
+    'default': {'BACKEND': 'django.core.files.storage.FileSystemStorage'},
+    'staticfiles': {'BACKEND': 'django.contrib.staticfiles.storage.StaticFilesStorage'},
+    'artifacts': ARTIFACT_STORAGE_CONFIG,
+}
 
 # Security settings
 # Désactiver SSL en développement, activer seulement en production avec vrai certificat
@@ -168,4 +195,46 @@ LOGGING = {
 }
 
 # Configuration pour Docker
-DOCKER_CONTAINER = config('DOCKER_CONTAINER', default=False, cast=bool)
\ No newline at end of file
+DOCKER_CONTAINER = config('DOCKER_CONTAINER', default=False, cast=bool)
+
+# Conversion PDF : 'win32com', 'libreoffice' ou chemin pointé d'une classe PDFConverter
+# (vide = win32com sous Windows, LibreOffice ailleurs)
+PDF_CONVERTER = config('PDF_CONVERTER', default='')
+LIBREOFFICE_BINARY = config('LIBREOFFICE_BINARY', default='') or None
+# win32com : instances Excel gardées chaudes par processus
+PDF_EXCEL_POOL_SIZE = config('PDF_EXCEL_POOL_SIZE', default=2, cast=int)
+PDF_CONVERSION_TIMEOUT = config('PDF_CONVERSION_TIMEOUT', default=300, cast=int)
+
+# API JSON (ERP) : jeton Bearer exigé si renseigné
+API_TOKEN = config('API_TOKEN', default='')
+# Lot sans réponse depuis plus longtemps (secondes, >= GUNICORN_TIMEOUT) : worker
+# tué en cours de traitement, la clé d'idempotence peut être rejouée
+API_BATCH_STALE_AFTER = config('API_BATCH_STALE_AFTER', default=600, cast=int)
+
+# Profilage (cProfile/pyinstrument + tracemalloc) de toutes les générations ;
+# sinon à la demande via la case du formulaire ou ?profile=1
+GENERATION_PROFILING = config('GENERATION_PROFILING', default=False, cast=bool)
+
+# Limites d'upload : corps hors fichiers (dont le JSON de l'API) et taille max d'un fichier PL/template
+DATA_UPLOAD_MAX_MEMORY_SIZE = config('DATA_UPLOAD_MAX_MEMORY_SIZE', default=50 * 1024 * 1024, cast=int)
+FILE_UPLOAD_MAX_MEMORY_SIZE = config('FILE_UPLOAD_MAX_MEMORY_SIZE', default=5 * 1024 * 1024, cast=int)
+MAX_UPLOAD_FILE_SIZE = config('MAX_UPLOAD_FILE_SIZE', default=100 * 1024 * 1024, cast=int)
+
+# Handlers standard de Django, avec calcul du SHA-256 pendant la réception
+# (déduplication des uploads sans relecture du fichier) et refus dès la réception
+# d'un fichier dépassant MAX_UPLOAD_FILE_SIZE
+FILE_UPLOAD_HANDLERS = [
+    'generator.uploads.HashingMemoryFileUploadHandler',
+    'generator.uploads.HashingTemporaryFileUploadHandler',
+]
+
+# Cache des PL déjà lus (Feather, nécessite pyarrow), indexé par SHA-256 de l'upload ;
+# éviction LRU au-delà de PL_CACHE_MAX_SIZE octets (0 = désactivé)
+PL_CACHE_DIR = config('PL_CACHE_DIR', default=os.path.join(MEDIA_ROOT, 'cache', 'pl'))
+PL_CACHE_MAX_SIZE = config('PL_CACHE_MAX_SIZE', default=1024 * 1024 * 1024, cast=int)
+
+# Vignettes PNG des fichiers générés : nombre max gardé dans le stockage (LRU)
+PREVIEW_CACHE_MAX_FILES = config('PREVIEW_CACHE_MAX_FILES', default=5000, cast=int)
+
+# Readiness : au-delà de ce nombre de générations en cours dans le worker, /readyz répond 503 (0 = sans limite)
+READINESS_MAX_IN_FLIGHT = config('READINESS_MAX_IN_FLIGHT', default=0, cast=int)
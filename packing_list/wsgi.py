@@ -14,3 +14,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'packing_list.settings')
 
 application = get_wsgi_application()
+
+# gunicorn --preload : modules lourds chargés une fois dans le maître et
+# partagés en copy-on-write par les workers forkés
+if os.environ.get('GENERATOR_PRELOAD', '').lower() in ('1', 'true', 'yes'):
+    from generator.warmup import preload
+    preload()